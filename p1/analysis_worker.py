@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后台词法分析
+在QThread中执行词法分析，分析结果按批通过信号送回界面线程，
+同时报告已分析的字节数，并可以在分析途中取消
+"""
+
+import io
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from lexical_analyzer import LexicalAnalyzer, TokenStream
+
+# 每批送回界面线程的单词数
+BATCH_SIZE = 5000
+
+
+class AnalysisWorker(QObject):
+    """
+    词法分析工作对象，移动到QThread后由线程的started信号调用run
+
+    源代码按UTF-8编码后以流的方式读入，已读入的字节数即为分析进度
+    """
+    # 一批单词（TokenStream），属性值已按分析器的符号表登记
+    batch_ready = pyqtSignal(object)
+    # 已分析的字节数, 总字节数
+    progress = pyqtSignal(int, int)
+    # 分析器, 是否被取消
+    finished = pyqtSignal(object, bool)
+
+    def __init__(self, code, backend='table', batch_size=BATCH_SIZE):
+        super().__init__()
+        self.code = code
+        self.backend = backend
+        self.batch_size = batch_size
+        self.cancelled = False
+
+    def cancel(self):
+        """请求取消分析，由界面线程直接调用，分析线程在下一批单词之后停止"""
+        self.cancelled = True
+
+    def run(self):
+        data = self.code.encode('utf-8')
+        stream = io.BytesIO(data)
+        total = len(data)
+        analyzer = LexicalAnalyzer(backend=self.backend, compact=True)
+        analyzer.load_stream(stream)
+
+        batch = TokenStream()
+        for token in analyzer.iter_tokens():
+            batch.append(token)
+            if len(batch) >= self.batch_size:
+                self.batch_ready.emit(batch)
+                self.progress.emit(stream.tell(), total)
+                batch = TokenStream()
+                if self.cancelled:
+                    break
+
+        if len(batch) and not self.cancelled:
+            self.batch_ready.emit(batch)
+        if not self.cancelled:
+            self.progress.emit(total, total)
+        self.finished.emit(analyzer, self.cancelled)
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+词法分析器性能测试
+生成确定的合成C语言子集源代码，在各扫描引擎上测量吞吐量、峰值内存和每个单词的内存分配
+
+用法: python -m benchmark --size 1M --mix identifier,number --backends default,table,regex
+"""
+
+from benchmark.corpus import MIXES, generate_source, parse_size
+from benchmark.runner import run_case, run_benchmark
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能测试命令行入口，在p1目录下运行: python -m benchmark
+"""
+
+import sys
+import json
+import argparse
+
+from lexical_analyzer import BACKENDS
+from benchmark.corpus import MIXES, generate_source, parse_size
+from benchmark.runner import run_benchmark
+
+
+def main():
+    parser = argparse.ArgumentParser(description='词法分析器性能测试')
+    parser.add_argument('-s', '--size', default='1M', help='源代码大小，可用逗号分隔多个，如 64K,1M（默认1M）')
+    parser.add_argument('-m', '--mix', default='balanced',
+                        help='单词比例，可用逗号分隔多个: %s（默认balanced）' % ','.join(MIXES))
+    parser.add_argument('-b', '--backends', default=','.join(BACKENDS), help='扫描引擎，用逗号分隔')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='每个用例重复次数，取最快的一次')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--compact', action='store_true', help='使用紧凑的TokenStream保存单词')
+    parser.add_argument('-o', '--output', help='JSON结果的输出文件，默认输出到标准输出')
+    parser.add_argument('--write', metavar='FILE', help='只生成源代码并写入文件（取第一个大小和比例）')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.size.split(',')]
+    mixes = args.mix.split(',')
+    backends = args.backends.split(',')
+    for mix in mixes:
+        if mix not in MIXES:
+            parser.error(f"未知的单词比例: {mix}")
+    for backend in backends:
+        if backend not in BACKENDS:
+            parser.error(f"未知的扫描引擎: {backend}")
+
+    if args.write:
+        with open(args.write, 'w', encoding='utf-8') as f:
+            f.write(generate_source(sizes[0], mixes[0], args.seed))
+        return
+
+    def progress(result):
+        print(f"{result['mix']:<12}{result['backend']:<10}{result['size']:>10}字符 "
+              f"{result['tokens_per_sec']:>10}单词/秒", file=sys.stderr)
+
+    report = run_benchmark(sizes, mixes, backends, args.compact, args.repeat, args.seed, progress)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
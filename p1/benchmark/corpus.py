@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成源代码生成器
+按给定的单词比例生成C语言子集源代码，同样的参数和随机种子总是生成同样的源代码
+"""
+
+import random
+from bisect import bisect_right
+
+from lexical_analyzer import keywords, delimiters, operators, relational_operators
+
+# 各类单词在源代码中所占的比例
+MIXES = {
+    'balanced': {'keyword': 15, 'identifier': 30, 'number': 15, 'string': 5,
+                 'operator': 10, 'delimiter': 15, 'relational': 8, 'error': 2},
+    'identifier': {'keyword': 10, 'identifier': 65, 'number': 5, 'string': 2,
+                   'operator': 5, 'delimiter': 10, 'relational': 3, 'error': 0},
+    'number': {'keyword': 5, 'identifier': 10, 'number': 60, 'string': 2,
+               'operator': 10, 'delimiter': 10, 'relational': 3, 'error': 0},
+    'string': {'keyword': 5, 'identifier': 10, 'number': 5, 'string': 60,
+               'operator': 5, 'delimiter': 12, 'relational': 3, 'error': 0},
+    'error': {'keyword': 10, 'identifier': 20, 'number': 10, 'string': 5,
+              'operator': 5, 'delimiter': 10, 'relational': 5, 'error': 35},
+}
+
+# 错误单词：非法字符、非法数字常量和非法运算符，不生成未闭合的字符串（会吞掉之后的全部源代码）
+ERROR_LEXEMES = ['%', '@', '#', '$', '?', '3abc', '12.', '7x9', '++']
+
+# 每行的单词数范围
+LINE_TOKENS = (3, 12)
+
+
+def parse_size(text):
+    """解析 64K、1M 这样的大小，返回字节数"""
+    units = {'K': 1024, 'M': 1024 * 1024, 'G': 1024 * 1024 * 1024}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def generate_source(size, mix='balanced', seed=0):
+    """
+    生成大约size个字符的源代码
+
+    单词之间用空格分隔、按行断开，保证每个生成的单词都被分析为一个单词；
+    标识符从固定大小的词汇表中选取，使符号表的查找既有命中也有新登记
+    """
+    weights = MIXES[mix]
+    rng = random.Random(seed)
+    categories = [name for name in weights if weights[name]]
+    cumulative = []
+    total = 0
+    for name in categories:
+        total += weights[name]
+        cumulative.append(total)
+
+    vocabulary = ['%s%d' % (rng.choice(['i', 'count', 'value', 'tmp', 'data_', 'x']), n) for n in range(512)]
+    words = ['alpha', 'beta', 'hello', 'world', 'value', '%d', '%s', 'x']
+    symbols = {
+        'keyword': keywords,
+        'delimiter': delimiters,
+        'operator': list(operators),
+        'relational': list(relational_operators),
+        'error': ERROR_LEXEMES,
+    }
+
+    pieces = []
+    length = 0
+    while length < size:
+        line = []
+        for _ in range(rng.randint(*LINE_TOKENS)):
+            category = categories[bisect_right(cumulative, rng.random() * total)]
+            if category == 'identifier':
+                lexeme = rng.choice(vocabulary)
+            elif category == 'number':
+                if rng.random() < 0.7:
+                    lexeme = str(rng.randint(0, 100000))
+                else:
+                    lexeme = '%d.%d' % (rng.randint(0, 999), rng.randint(0, 999))
+            elif category == 'string':
+                lexeme = '"%s"' % ' '.join(rng.choice(words) for _ in range(rng.randint(0, 6)))
+            else:
+                lexeme = rng.choice(symbols[category])
+            line.append(lexeme)
+        text = '    ' * rng.randint(0, 3) + ' '.join(line) + '\n'
+        pieces.append(text)
+        length += len(text)
+    return ''.join(pieces)
+
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能测试的执行和测量
+每个测试用例在新启动的子进程中运行，峰值内存不受其他用例和主进程的影响
+"""
+
+import gc
+import sys
+import time
+import platform
+import tracemalloc
+import multiprocessing
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，不报告峰值内存
+    resource = None
+
+from lexical_analyzer import LexicalAnalyzer, BACKENDS
+from benchmark.corpus import generate_source
+
+
+def peak_rss_kb():
+    """当前进程的峰值常驻内存（KB），macOS上ru_maxrss的单位是字节"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def analyze_source(source, backend, compact):
+    analyzer = LexicalAnalyzer(backend=backend, compact=compact)
+    analyzer.load_string(source)
+    analyzer.analyze()
+    return analyzer
+
+
+def measure_case(size, mix, backend, compact=False, repeat=3, seed=0):
+    """
+    在当前进程中测量一个用例，由run_case在子进程中调用
+
+    吞吐量取repeat次中最快的一次；分析结束后记录峰值内存，
+    再分别统计保留的内存块数和tracemalloc记录的内存分配峰值，
+    Python没有累计分配次数的计数器，以分析结果保留的内存块数代表每个单词的分配次数
+    """
+    source = generate_source(size, mix, seed)
+    baseline_rss = peak_rss_kb()
+
+    best = None
+    token_count = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        analyzer = analyze_source(source, backend, compact)
+        elapsed = time.perf_counter() - start
+        token_count = len(analyzer.tokens)
+        error_count = analyzer.error_count
+        del analyzer
+        if best is None or elapsed < best:
+            best = elapsed
+    peak_rss = peak_rss_kb()
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    analyzer = analyze_source(source, backend, compact)
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+    del analyzer
+
+    gc.collect()
+    tracemalloc.start()
+    analyzer = analyze_source(source, backend, compact)
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del analyzer
+
+    per_token = max(token_count, 1)
+    return {
+        'mix': mix,
+        'backend': backend,
+        'compact': compact,
+        'size': len(source),
+        'tokens': token_count,
+        'errors': error_count,
+        'seconds': round(best, 6),
+        'tokens_per_sec': round(token_count / best) if best else None,
+        'mb_per_sec': round(len(source) / best / (1024 * 1024), 3) if best else None,
+        'baseline_rss_kb': baseline_rss,
+        'peak_rss_kb': peak_rss,
+        'retained_blocks_per_token': round(retained_blocks / per_token, 3),
+        'peak_alloc_bytes_per_token': round(traced_peak / per_token, 1),
+    }
+
+
+def run_case(size, mix, backend, compact=False, repeat=3, seed=0):
+    """在新启动的子进程中测量一个用例"""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(measure_case, (size, mix, backend, compact, repeat, seed))
+
+
+def run_benchmark(sizes, mixes, backends=BACKENDS, compact=False, repeat=3, seed=0, progress=None):
+    """
+    测量各大小、比例和扫描引擎的全部组合，返回可以直接序列化为JSON的结果
+
+    progress为每个用例完成后调用的函数，参数为该用例的结果
+    """
+    results = []
+    for size in sizes:
+        for mix in mixes:
+            for backend in backends:
+                result = run_case(size, mix, backend, compact, repeat, seed)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行入口的启动时间测试
+用 python -X importtime 运行各程序的命令行入口，统计导入模块的耗时和进程的总耗时，
+检查命令行路径没有导入图形界面和PDF库，并且导入耗时不超过预算；任何一项不满足时以非零状态退出
+
+用法（在p1目录下）: python -m benchmark.startup --budget 150
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# 仓库根目录，各程序的目录相对于它
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 各程序的命令行入口: (名称, 程序目录, 命令行参数, 标准输入)，参数以-c开头时直接运行其中的代码
+ENTRIES = [
+    ('p1-cli', 'p1', ['main.py', '-c', '-f', 'test.c', '-s'], ''),
+    ('p1-service', 'p1', ['lexer_service.py'], '{"id": 1, "path": "test.c", "tokens": false}\n'),
+    # 只使用统计函数的程序导入报告模块时不应载入ReportLab
+    ('p1-report', 'p1', ['-c', 'import report_generator'], ''),
+    ('p2-ll1', 'p2', ['ll1_parser.py'], 'q\n'),
+    ('p3-postfix', 'p3', ['main.py'], 'q\n'),
+    ('p4-lr1', 'p4', ['run.py', '--cli'], 'exit\n'),
+]
+
+# 命令行路径不应导入的顶层包
+FORBIDDEN_MODULES = ('PyQt6', 'reportlab')
+
+# 默认的导入耗时预算（毫秒），不含解释器自身启动时的导入
+DEFAULT_BUDGET_MS = 150
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+    返回 (顶层导入的累计耗时（微秒）之和, 导入的全部模块名)
+    """
+    total = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            # 表头行
+            continue
+        name = parts[2]
+        modules.append(name.strip())
+        # 模块名前只有一个空格的是顶层导入，其累计耗时已包含它导入的其他模块
+        if not name.startswith('  '):
+            total += int(parts[1])
+    return total, modules
+
+
+def run_once(args, cwd, stdin):
+    """用 -X importtime 运行一次，返回 (总耗时秒数, 退出状态, 标准错误)"""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=cwd, input=stdin,
+                             capture_output=True, text=True, encoding='utf-8', errors='replace')
+    return time.perf_counter() - start, process.returncode, process.stderr
+
+
+def measure_entry(name, directory, args, stdin, repeat):
+    """测量一个入口，取repeat次中最快的一次"""
+    cwd = os.path.join(REPO_ROOT, directory)
+    best = None
+    for _ in range(repeat):
+        elapsed, returncode, stderr = run_once(args, cwd, stdin)
+        import_us, modules = parse_importtime(stderr)
+        if best is None or elapsed < best['wall_ms'] / 1000:
+            forbidden = sorted({module.split('.')[0] for module in modules
+                                if module.split('.')[0] in FORBIDDEN_MODULES})
+            best = {
+                'entry': name,
+                'command': ' '.join(args if args[0] == '-c' else [directory + '/' + args[0]] + args[1:]),
+                'returncode': returncode,
+                'wall_ms': round(elapsed * 1000, 1),
+                'import_ms': round(import_us / 1000, 1),
+                'module_count': len(modules),
+                'forbidden_imports': forbidden,
+            }
+    return best
+
+
+def run_startup_benchmark(repeat=5, budget_ms=DEFAULT_BUDGET_MS, entries=ENTRIES):
+    """
+    测量全部入口，返回结果列表
+    导入耗时扣除空程序（python -c pass）的导入耗时，即解释器自身启动时的导入
+    """
+    baseline = measure_entry('python', '.', ['-c', 'pass'], '', repeat)
+    results = []
+    for name, directory, args, stdin in entries:
+        result = measure_entry(name, directory, args, stdin, repeat)
+        result['import_ms'] = round(max(result['import_ms'] - baseline['import_ms'], 0), 1)
+        failures = []
+        if result['returncode'] != 0:
+            failures.append(f"退出状态为{result['returncode']}")
+        if result['forbidden_imports']:
+            failures.append(f"导入了{', '.join(result['forbidden_imports'])}")
+        if result['import_ms'] > budget_ms:
+            failures.append(f"导入耗时{result['import_ms']}ms超过预算{budget_ms}ms")
+        result['failures'] = failures
+        results.append(result)
+    return baseline, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='命令行入口的启动时间测试')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='每个入口运行的次数，取最快的一次')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'每个入口的导入耗时预算（毫秒），默认为{DEFAULT_BUDGET_MS}')
+    parser.add_argument('-o', '--output', help='JSON结果的输出文件')
+    args = parser.parse_args()
+
+    baseline, results = run_startup_benchmark(args.repeat, args.budget)
+    print(f"{'入口':<14}{'总耗时(ms)':<12}{'导入耗时(ms)':<14}{'模块数':<8}结果")
+    print(f"{'python':<14}{baseline['wall_ms']:<12}{baseline['import_ms']:<14}{baseline['module_count']:<8}基准")
+    for result in results:
+        status = '; '.join(result['failures']) or '通过'
+        print(f"{result['entry']:<14}{result['wall_ms']:<12}{result['import_ms']:<14}{result['module_count']:<8}{status}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'baseline': baseline, 'budget_ms': args.budget, 'entries': results}, f,
+                      ensure_ascii=False, indent=2)
+            f.write('\n')
+    if any(result['failures'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
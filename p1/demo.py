@@ -5,7 +5,9 @@
 词法分析器演示程序
 """
 
-from lexical_analyzer import LexicalAnalyzer
+import sys
+
+from lexical_analyzer import LexicalAnalyzer, BACKENDS
 
 def analyze_file(filename):
     """分析指定的文件并打印结果"""
@@ -18,11 +20,7 @@ def analyze_file(filename):
         analyzer.print_results()
         
         # 打印统计信息
-        print("\n分析统计:")
-        from lexical_analyzer import identifiers, constants
-        print(f"标识符表: {identifiers}")
-        print(f"常数表: {constants}")
-        print(f"错误数量: {analyzer.error_count}")
+        analyzer.print_statistics()
     else:
         print(f"无法打开文件: {filename}")
 
@@ -37,31 +35,44 @@ def analyze_code(code, description):
     analyzer.print_results()
     
     # 打印统计信息
-    print("\n分析统计:")
-    from lexical_analyzer import identifiers, constants
-    print(f"标识符表: {identifiers}")
-    print(f"常数表: {constants}")
-    print(f"错误数量: {analyzer.error_count}")
+    analyzer.print_statistics()
+
+def compare_backends(filename):
+    """用所有扫描引擎分析同一文件，检查输出是否与手写扫描器一致，无法读取文件时也返回False"""
+    results = {}
+    for backend in BACKENDS:
+        analyzer = LexicalAnalyzer(backend=backend)
+        if not analyzer.load_file(filename):
+            return False
+        tokens = analyzer.analyze()
+        results[backend] = (tokens, analyzer.identifiers, analyzer.constants, analyzer.error_count)
+        
+    expected = results['default']
+    all_same = True
+    for backend in BACKENDS:
+        same = results[backend] == expected
+        all_same = all_same and same
+        print(f"{filename}: {backend:<8} {'一致' if same else '不一致'}")
+    return all_same
 
 def main():
-    # 清空原有的标识符和常数表
-    from lexical_analyzer import identifiers, constants
-    identifiers.clear()
-    constants.clear()
-    
     # 分析简单的测试文件
     analyze_file("test.c")
     
     # 分析复杂的测试文件
-    identifiers.clear()
-    constants.clear()
     analyze_file("test_complex.c")
     
     # 分析测试例子
-    identifiers.clear()
-    constants.clear()
     analyze_code("""If i=0 then n++;
 a<= 3b %);""", "题目中的测试例子")
+    
+    # 检查各扫描引擎的输出是否一致
+    print("\n扫描引擎一致性检查")
+    print("=" * 50)
+    results = [compare_backends(filename) for filename in ("test.c", "test_complex.c")]
+    if not all(results):
+        print("扫描引擎一致性检查未通过")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+表驱动的DFA扫描引擎
+将语言配置中的关键字表、分界符表和运算符字典树编译为字符类表和状态转移表，
+扫描时只做查表操作，输出与手写扫描器完全一致的单词序列
+"""
+
+import re
+
+from lexical_analyzer import TYPE_KEYWORD, TYPE_DELIMITER, TYPE_CONSTANT, TYPE_IDENTIFIER
+from operator_trie import TRIE_ACCEPT
+
+# 字符类
+C_SPACE = 0     # 换行以外的空白字符
+C_ALPHA = 1     # 字母和下划线
+C_DIGIT = 2     # 数字
+C_ALNUM = 3     # 既不是字母也不是数字的字母数字字符（如½）
+C_OTHER = 4     # 其他字符
+C_NEWLINE = 5   # 换行符
+C_FIRST_PUNCT = 6  # 表格中出现的符号，每个符号单独占一个字符类
+
+# 扫描状态
+S_START = 0
+S_SPACE = 1
+S_IDENT = 2
+S_INT = 3
+S_DOT = 4
+S_FRAC = 5
+S_BADNUM = 6
+S_STRING = 7
+S_STRING_END = 8
+S_DELIMITER = 9
+S_ILLEGAL = 10
+S_UNKNOWN = 11
+S_OPERATOR = 12  # 运算符字典树的各节点从这里开始依次编号
+
+# 状态结束时执行的动作
+A_SKIP = 0
+A_IDENT = 1
+A_NUMBER = 2
+A_BAD_DOT = 3
+A_BAD_NUMBER = 4
+A_STRING = 5
+A_OPEN_STRING = 6
+A_DELIMITER = 7
+A_OPERATOR = 8
+A_OPERATOR_PREFIX = 9
+A_ILLEGAL = 10
+A_UNKNOWN = 11
+
+
+class _CharClassMap(dict):
+    """码位到字符类的映射，供str.translate使用，非ASCII字符在首次出现时分类并缓存"""
+
+    def __init__(self, punct_classes):
+        super().__init__()
+        self.punct_classes = punct_classes
+        for code in range(128):
+            self[code] = chr(self.classify(chr(code)))
+
+    def classify(self, char):
+        if char == '\n':
+            return C_NEWLINE
+        if char.isspace():
+            return C_SPACE
+        if char.isalpha() or char == '_':
+            return C_ALPHA
+        if char.isdigit():
+            return C_DIGIT
+        if char in self.punct_classes:
+            return self.punct_classes[char]
+        if char.isalnum():
+            return C_ALNUM
+        return C_OTHER
+
+    def __missing__(self, code):
+        value = chr(self.classify(chr(code)))
+        self[code] = value
+        return value
+
+
+class DfaScanner:
+    def __init__(self, profile, recovery=False):
+        self.keywords = profile.keyword_set
+        self.operator_table = profile.operator_table
+        self.operator_trie = profile.operator_trie
+        self.illegal_chars = profile.illegal_chars
+
+        # 为表格中出现的每个符号分配字符类
+        punct_chars = ['.', '"']
+        for lexeme in list(profile.delimiters) + list(profile.operator_table) + list(profile.illegal_chars):
+            for char in lexeme:
+                if char not in punct_chars:
+                    punct_chars.append(char)
+        punct_classes = {char: C_FIRST_PUNCT + i for i, char in enumerate(punct_chars)}
+        self.class_map = _CharClassMap(punct_classes)
+        class_count = C_FIRST_PUNCT + len(punct_chars)
+
+        # 运算符字典树的每个节点对应一个状态
+        nodes = []
+        pending = [(profile.operator_trie.root, None, None)]
+        while pending:
+            node, parent, char = pending.pop()
+            state = S_OPERATOR + len(nodes) - 1 if nodes else S_START
+            nodes.append((node, state, parent, char))
+            for next_char, child in node.items():
+                if next_char != TRIE_ACCEPT:
+                    pending.append((child, state, next_char))
+        state_count = S_OPERATOR + len(nodes) - 1
+
+        # 构造状态转移表，-1表示当前单词结束
+        delta = [[-1] * class_count for _ in range(state_count)]
+        actions = [A_SKIP] * state_count
+        start = delta[S_START]
+
+        for cls in range(class_count):
+            start[cls] = S_UNKNOWN
+        start[C_SPACE] = S_SPACE
+        start[C_NEWLINE] = S_SPACE
+        start[C_ALPHA] = S_IDENT
+        start[C_DIGIT] = S_INT
+        start[punct_classes['"']] = S_STRING
+        for char in profile.delimiters:
+            start[punct_classes[char]] = S_DELIMITER
+        for char in profile.illegal_chars:
+            start[punct_classes[char]] = S_ILLEGAL
+        # 运算符：沿字典树逐字符转移，结束时所在节点是完整运算符则输出，否则退回到最长的运算符
+        for node, state, parent, char in nodes[1:]:
+            delta[parent][punct_classes[char]] = state
+            actions[state] = A_OPERATOR if TRIE_ACCEPT in node else A_OPERATOR_PREFIX
+
+        delta[S_SPACE][C_SPACE] = S_SPACE
+        delta[S_SPACE][C_NEWLINE] = S_SPACE
+        for cls in (C_ALPHA, C_DIGIT, C_ALNUM):
+            delta[S_IDENT][cls] = S_IDENT
+            delta[S_BADNUM][cls] = S_BADNUM
+
+        dot = punct_classes['.']
+        delta[S_INT][C_DIGIT] = S_INT
+        delta[S_INT][dot] = S_DOT
+        delta[S_INT][C_ALPHA] = S_BADNUM
+        delta[S_DOT][C_DIGIT] = S_FRAC
+        delta[S_DOT][C_ALPHA] = S_BADNUM
+        delta[S_FRAC][C_DIGIT] = S_FRAC
+        delta[S_FRAC][C_ALPHA] = S_BADNUM
+
+        quote = punct_classes['"']
+        for cls in range(class_count):
+            delta[S_STRING][cls] = S_STRING
+        delta[S_STRING][quote] = S_STRING_END
+
+        actions[S_IDENT] = A_IDENT
+        actions[S_INT] = A_NUMBER
+        actions[S_FRAC] = A_NUMBER
+        actions[S_DOT] = A_BAD_DOT
+        actions[S_BADNUM] = A_BAD_NUMBER
+        actions[S_STRING] = A_OPEN_STRING
+        actions[S_STRING_END] = A_STRING
+        actions[S_DELIMITER] = A_DELIMITER
+        actions[S_ILLEGAL] = A_ILLEGAL
+        actions[S_UNKNOWN] = A_UNKNOWN
+
+        self.delta = delta
+        self.actions = actions
+        self.number_classes = (C_DIGIT, dot)
+
+        # 恢复模式：在字符类串上匹配一段未识别的字符，中间可以隔着换行以外的空白，
+        # 匹配结束于最后一个未识别的字符
+        self.unknown_run = None
+        if recovery:
+            unknown = b''.join(re.escape(bytes([cls])) for cls in range(class_count) if start[cls] == S_UNKNOWN)
+            self.unknown_run = re.compile(b'(?:%s*[%s])*' % (re.escape(bytes([C_SPACE])), unknown))
+
+    def scan(self, text):
+        """
+        扫描整个缓冲区
+
+        逐个产生 (类型, 值, 定位偏移, 结束偏移, 错误信息) 记录；
+        定位偏移与手写扫描器中报告位置时的当前字符一致，
+        结束偏移为单词之后第一个未消耗字符的位置
+        """
+        classes = text.translate(self.class_map).encode('latin-1')
+        delta = self.delta
+        actions = self.actions
+        keywords = self.keywords
+        operator_table = self.operator_table
+        start_row = delta[S_START]
+        n = len(text)
+        last = n - 1
+        i = 0
+
+        while i < n:
+            start = i
+            state = start_row[classes[i]]
+            row = delta[state]
+            i += 1
+            while i < n:
+                nxt = row[classes[i]]
+                if nxt < 0:
+                    break
+                if nxt != state:
+                    state = nxt
+                    row = delta[state]
+                i += 1
+
+            action = actions[state]
+            if action == A_SKIP:
+                continue
+            if action == A_IDENT:
+                lexeme = text[start:i]
+                if lexeme in keywords:
+                    yield (TYPE_KEYWORD, lexeme, start, i, None)
+                else:
+                    yield (TYPE_IDENTIFIER, lexeme, start, i, None)
+            elif action == A_DELIMITER:
+                yield (TYPE_DELIMITER, text[start:i], start, i, None)
+            elif action == A_OPERATOR:
+                token_type, value, error_msg = operator_table[text[start:i]]
+                yield (token_type, value, start, i, error_msg)
+            elif action == A_NUMBER or action == A_STRING:
+                yield (TYPE_CONSTANT, text[start:i], start, i, None)
+            elif action == A_OPERATOR_PREFIX:
+                # 停在运算符的前缀上，退回到其中最长的运算符，没有则只消耗一个字符
+                lexeme = self.operator_trie.match(text, start)
+                if lexeme is None:
+                    i = start + 1
+                    error_msg = f"未识别的字符: {text[start]}"
+                    yield ('Error', error_msg, start, i, error_msg)
+                else:
+                    i = start + len(lexeme)
+                    token_type, value, error_msg = operator_table[lexeme]
+                    yield (token_type, value, start, i, error_msg)
+            elif action == A_BAD_NUMBER:
+                # 手写扫描器会把第一个非法字符重复记录一次
+                bad = start
+                while classes[bad] in self.number_classes:
+                    bad += 1
+                lexeme = text[start:bad] + text[bad] + text[bad:i]
+                error_msg = f"非法的数字常量: {lexeme}"
+                yield ('Error', error_msg, min(i, last), i, error_msg)
+            elif action == A_BAD_DOT:
+                error_msg = f"非法的数字常量: {text[start:i]}"
+                yield ('Error', error_msg, min(i, last), i, error_msg)
+            elif action == A_OPEN_STRING:
+                error_msg = f"未闭合的字符串常量: {text[start:i]}"
+                yield ('Error', error_msg, last, i, error_msg)
+            elif action == A_ILLEGAL:
+                error_msg = f"{self.illegal_chars[text[start]]}: {text[start]}"
+                yield ('Error', error_msg, start, i, error_msg)
+            else:
+                if self.unknown_run is not None:
+                    i = self.unknown_run.match(classes, i).end()
+                error_msg = f"未识别的字符: {text[start:i]}"
+                yield ('Error', error_msg, start, i, error_msg)
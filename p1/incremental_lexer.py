@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+增量词法分析
+按行保存分析状态（行首是否在字符串中）和各行的单词，源代码修改后只从第一个被修改的行开始重新扫描，
+直到新的单词与原有的单词重新同步，得到对单词序列的最小修改，供图形界面边输入边分析
+"""
+
+from lexical_analyzer import (LexicalAnalyzer, SymbolTable, Token, DEFAULT_PROFILE, TYPE_KEYWORD,
+                              TYPE_DELIMITER, TYPE_CONSTANT, TYPE_IDENTIFIER)
+
+
+def split_lines(text):
+    """只按换行符切分源代码，除最后一行外每行保留行尾的换行符，行数等于换行符个数加1"""
+    parts = text.split('\n')
+    lines = [part + '\n' for part in parts[:-1]]
+    lines.append(parts[-1])
+    return lines
+
+
+class LexPatch:
+    """
+    一次增量分析对单词序列的修改
+
+    从start_row开始删除removed个单词并插入tokens中的单词；其后的单词内容不变，
+    行号整体加上line_shift，attributes中列出属性值发生变化的 (单词下标, 新属性值)
+    """
+    def __init__(self, start_row, removed, tokens, line_shift=0, attributes=None,
+                 errors_changed=False, symbols_changed=False):
+        self.start_row = start_row
+        self.removed = removed
+        self.tokens = tokens
+        self.line_shift = line_shift
+        self.attributes = attributes or []
+        self.errors_changed = errors_changed
+        self.symbols_changed = symbols_changed
+
+    @property
+    def tail_row(self):
+        """修改之后第一个未重新扫描的单词的下标"""
+        return self.start_row + len(self.tokens)
+
+    def is_empty(self):
+        return not (self.removed or self.tokens or self.line_shift or self.attributes)
+
+
+class IncrementalLexer:
+    """
+    增量词法分析器
+
+    每行保存以该行开头的单词记录 (类型, 值, 行内偏移, 错误信息)，行号由行的下标得到；
+    只有字符串能跨行，因此行首是否在字符串中由之前双引号个数的奇偶性决定，
+    修改后从不在字符串中的行开始重新扫描。结果与LexicalAnalyzer对整个源代码的分析一致
+    """
+    def __init__(self, profile=None):
+        self.profile = profile or DEFAULT_PROFILE
+        self.scanner = LexicalAnalyzer(profile=self.profile).get_scanner('regex')
+        self.lines = ['']
+        self.line_tokens = [[]]
+        # 各行行首是否在字符串中
+        self.in_string = [False]
+        # 分析各行之前标识符表和常数表的长度
+        self.symbol_marks = [(0, 0)]
+        self.identifiers = SymbolTable()
+        self.constants = SymbolTable()
+        self.token_count = 0
+        self.error_count = 0
+
+    def update(self, text):
+        """用修改后的源代码更新分析结果，返回对单词序列的修改LexPatch"""
+        new_lines = split_lines(text)
+        old_lines = self.lines
+        old_count = len(old_lines)
+        new_count = len(new_lines)
+        limit = min(old_count, new_count)
+
+        # 找出未修改的开头若干行和末尾若干行
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        if prefix == old_count == new_count:
+            return LexPatch(self.token_count, 0, [])
+        suffix = 0
+        while suffix < limit - prefix and old_lines[old_count - 1 - suffix] == new_lines[new_count - 1 - suffix]:
+            suffix += 1
+
+        # 从修改处向前退到不在字符串中的行
+        restart = min(prefix, limit - 1)
+        while restart > 0 and self.in_string[restart]:
+            restart -= 1
+        shift = new_count - old_count
+        new_tail = new_count - suffix
+
+        line = restart
+        line_start = sum(map(len, new_lines[:restart]))
+        line_end = line_start + len(new_lines[restart])
+        current = []
+        scanned = [current]
+        old_tokens = self.line_tokens[restart - shift] if restart >= new_tail else None
+        old_index = 0
+        resync = None
+
+        for token_type, value, anchor, end, error_msg in self.scanner.scan(text, line_start):
+            while anchor >= line_end and line + 1 < new_count:
+                line += 1
+                line_start = line_end
+                line_end += len(new_lines[line])
+                current = []
+                scanned.append(current)
+                if line >= new_tail:
+                    old_tokens = self.line_tokens[line - shift]
+                    old_index = 0
+
+            record = (token_type, value, anchor - line_start, error_msg)
+            if old_tokens is not None:
+                # 未修改的行中出现与原来相同的单词，之后的扫描结果必然与原来相同
+                while old_index < len(old_tokens) and old_tokens[old_index][2] < record[2]:
+                    old_index += 1
+                if old_index < len(old_tokens) and old_tokens[old_index] == record:
+                    resync = line
+                    break
+            current.append(record)
+
+        added = sum(map(len, scanned))
+        if resync is None:
+            while line + 1 < new_count:
+                line += 1
+                scanned.append([])
+            old_end_line = old_count
+            tail_lines = []
+        else:
+            old_end_line = resync - shift
+            current.extend(old_tokens[old_index:])
+            tail_lines = self.line_tokens[old_end_line + 1:]
+
+        start_row = sum(map(len, self.line_tokens[:restart]))
+        removed_records = [record for records in self.line_tokens[restart:old_end_line] for record in records]
+        if resync is not None:
+            removed_records += old_tokens[:old_index]
+        added_records = [(restart + i, record) for i, records in enumerate(scanned) for record in records][:added]
+
+        # 各行行首是否在字符串中
+        in_string = self.in_string[:restart]
+        state = self.in_string[restart]
+        for i in range(restart, restart + len(scanned)):
+            in_string.append(state)
+            if new_lines[i].count('"') % 2:
+                state = not state
+        if resync is not None:
+            in_string += self.in_string[old_end_line + 1:]
+
+        # 从restart行之前的状态开始重新登记符号表
+        identifier_mark, constant_mark = self.symbol_marks[restart]
+        identifiers = SymbolTable(self.identifiers.symbols[:identifier_mark])
+        constants = SymbolTable(self.constants.symbols[:constant_mark])
+        symbol_marks = self.symbol_marks[:restart]
+        for records in scanned:
+            symbol_marks.append((len(identifiers), len(constants)))
+            self.intern_records(records, identifiers, constants)
+
+        attributes = []
+        if resync is not None:
+            if old_end_line + 1 < old_count:
+                next_marks = self.symbol_marks[old_end_line + 1]
+            else:
+                next_marks = (len(self.identifiers), len(self.constants))
+            if (identifiers.symbols == self.identifiers.symbols[:next_marks[0]] and
+                    constants.symbols == self.constants.symbols[:next_marks[1]]):
+                # 同步点的符号表与原来相同，之后的登记结果也相同
+                identifiers = self.identifiers
+                constants = self.constants
+                symbol_marks += self.symbol_marks[old_end_line + 1:]
+            else:
+                # 符号表的顺序变了，之后的单词需要重新登记并找出属性值变化的单词
+                for records in tail_lines:
+                    symbol_marks.append((len(identifiers), len(constants)))
+                    self.intern_records(records, identifiers, constants)
+                row = start_row + added
+                for records in [old_tokens[old_index:]] + tail_lines:
+                    for token_type, value, offset, error_msg in records:
+                        if token_type == TYPE_IDENTIFIER:
+                            attribute = identifiers.indexes[value]
+                            if attribute != self.identifiers.indexes[value]:
+                                attributes.append((row, attribute))
+                        elif token_type == TYPE_CONSTANT:
+                            attribute = constants.indexes[value]
+                            if attribute != self.constants.indexes[value]:
+                                attributes.append((row, attribute))
+                        row += 1
+        symbols_changed = identifiers is not self.identifiers and (
+            identifiers != self.identifiers or constants != self.constants)
+
+        removed_errors = sum(1 for record in removed_records if record[0] == 'Error')
+        added_errors = sum(1 for line, record in added_records if record[0] == 'Error')
+        errors_changed = bool(removed_errors or added_errors or (shift and self.error_count))
+
+        self.lines = new_lines
+        self.line_tokens = self.line_tokens[:restart] + scanned + tail_lines
+        self.in_string = in_string
+        self.symbol_marks = symbol_marks
+        self.identifiers = identifiers
+        self.constants = constants
+        self.token_count += added - len(removed_records)
+        self.error_count += added_errors - removed_errors
+
+        tokens = [self.make_token(line, record) for line, record in added_records]
+        return LexPatch(start_row, len(removed_records), tokens, shift, attributes,
+                        errors_changed, symbols_changed)
+
+    def intern_records(self, records, identifiers, constants):
+        """按顺序把单词记录中的标识符和常数登记到符号表中"""
+        for record in records:
+            if record[0] == TYPE_IDENTIFIER:
+                identifiers.intern(record[1])
+            elif record[0] == TYPE_CONSTANT:
+                constants.intern(record[1])
+
+    def get_attribute(self, token_type, value):
+        """单词的属性值，与LexicalAnalyzer的分析结果一致"""
+        if token_type == TYPE_IDENTIFIER:
+            return self.identifiers.indexes[value]
+        if token_type == TYPE_CONSTANT:
+            return self.constants.indexes[value]
+        if token_type == TYPE_KEYWORD:
+            return self.profile.keyword_indexes[value]
+        if token_type == TYPE_DELIMITER:
+            return self.profile.delimiter_indexes[value]
+        return self.profile.operator_codes[value]
+
+    def make_token(self, line, record):
+        """由第line行（下标从0开始）的单词记录构造Token"""
+        token_type, value, offset, error_msg = record
+        if token_type == 'Error':
+            if self.lines[line][offset] == '\n':
+                # 与手写扫描器一致：读入换行符后位置落在下一行第0列
+                return Token('Error', value, line + 2, 0, None, error_msg)
+            return Token('Error', value, line + 1, offset + 1, None, error_msg)
+        return Token(token_type, value, line + 1, offset + 1, self.get_attribute(token_type, value))
+
+    def tokens(self):
+        """按顺序产生全部单词"""
+        for line, records in enumerate(self.line_tokens):
+            for record in records:
+                yield self.make_token(line, record)
+
+    def errors(self):
+        """按顺序产生全部错误单词"""
+        for line, records in enumerate(self.line_tokens):
+            for record in records:
+                if record[0] == 'Error':
+                    yield self.make_token(line, record)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+语言配置
+用JSON或TOML文件描述关键字、分界符、运算符及其编码，载入时编译为查找表：
+关键字和分界符的下标表、运算符编码表和按最长匹配查找运算符的字典树，
+编译结果按文件缓存，各扫描引擎再由配置生成各自的扫描表，不必修改代码即可分析C子集的各种方言
+"""
+
+import os
+import json
+import hashlib
+
+from operator_trie import OperatorTrie
+
+# 单词种别码定义
+TYPE_KEYWORD = 1      # 关键字
+TYPE_DELIMITER = 2    # 分界符
+TYPE_OPERATOR = 3     # 算术运算符
+TYPE_RELATIONAL = 4   # 关系运算符
+TYPE_CONSTANT = 5     # 常数
+TYPE_IDENTIFIER = 6   # 标识符
+
+# 已载入的配置文件，键为 (绝对路径, 修改时间, 大小)
+_profile_cache = {}
+
+
+def parse_code(code):
+    """运算符编码可以写成整数或 "0x10" 形式的字符串"""
+    if isinstance(code, str):
+        return int(code, 0)
+    if isinstance(code, bool) or not isinstance(code, int):
+        raise ValueError(f"运算符编码必须是整数或字符串: {code!r}")
+    return code
+
+
+def check_string_list(key, value):
+    """配置项必须是字符串列表，单个字符串不会被当作字符序列拆开"""
+    if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"配置项 {key} 必须是字符串列表")
+    return list(value)
+
+
+def check_string_dict(key, value):
+    """配置项必须是以字符串为键的字典"""
+    if not isinstance(value, dict) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"配置项 {key} 必须是以字符串为键的字典")
+    return value
+
+
+class LanguageProfile:
+    """
+    编译后的语言配置
+
+    operators和relational_operators为 运算符 -> 编码，error_operators为 运算符 -> 错误信息，
+    这些运算符识别为错误单词（如C子集中的++）；illegal_chars为 字符 -> 错误信息，
+    这些字符给出专门的错误信息（如%），其他无法识别的字符统一报告为未识别的字符
+    """
+    def __init__(self, name, keywords, delimiters, operators, relational_operators,
+                 error_operators=None, illegal_chars=None):
+        if not isinstance(name, str):
+            raise ValueError("配置项 name 必须是字符串")
+        self.name = name
+        self.keywords = check_string_list('keywords', keywords)
+        self.delimiters = check_string_list('delimiters', delimiters)
+        self.operators = {op: parse_code(code) for op, code in check_string_dict('operators', operators).items()}
+        self.relational_operators = {op: parse_code(code) for op, code in
+                                     check_string_dict('relational_operators', relational_operators).items()}
+        self.error_operators = dict(check_string_dict('error_operators', error_operators or {}))
+        self.illegal_chars = dict(check_string_dict('illegal_chars', illegal_chars or {}))
+        for key, table in (('error_operators', self.error_operators), ('illegal_chars', self.illegal_chars)):
+            if not all(isinstance(message, str) for message in table.values()):
+                raise ValueError(f"配置项 {key} 的错误信息必须是字符串")
+        self.validate()
+        self.compile()
+
+    def validate(self):
+        """检查各表之间没有冲突，运算符和分界符不会与标识符、数字、字符串混淆"""
+        for word in self.keywords:
+            if not word or not (word[0].isalpha() or word[0] == '_') or not all(
+                    char.isalnum() or char == '_' for char in word):
+                raise ValueError(f"关键字必须是合法的标识符: {word!r}")
+        if len(set(self.keywords)) != len(self.keywords):
+            raise ValueError("关键字表中有重复的关键字")
+
+        symbols = [(op, '运算符') for op in self.operators]
+        symbols += [(op, '关系运算符') for op in self.relational_operators]
+        symbols += [(op, '错误运算符') for op in self.error_operators]
+        seen = {}
+        for lexeme, kind in symbols:
+            if lexeme in seen:
+                raise ValueError(f"{lexeme!r} 同时出现在{seen[lexeme]}表和{kind}表中")
+            seen[lexeme] = kind
+            if not lexeme or any(char.isspace() or char.isalnum() or char in '_"' for char in lexeme):
+                raise ValueError(f"运算符只能由标点符号组成: {lexeme!r}")
+
+        for table, kind in ((self.delimiters, '分界符'), (self.illegal_chars, '非法字符')):
+            for char in table:
+                if len(char) != 1 or char.isspace() or char.isalnum() or char in '_"':
+                    raise ValueError(f"{kind}必须是单个标点符号: {char!r}")
+        if len(set(self.delimiters)) != len(self.delimiters):
+            raise ValueError("分界符表中有重复的分界符")
+        operator_starts = {lexeme[0] for lexeme in seen}
+        for char in self.delimiters:
+            if char in operator_starts or char in self.illegal_chars:
+                raise ValueError(f"分界符 {char!r} 与运算符或非法字符冲突")
+        for char in self.illegal_chars:
+            if char in operator_starts:
+                raise ValueError(f"非法字符 {char!r} 与运算符冲突")
+
+    def compile(self):
+        """生成扫描时使用的查找表"""
+        self.keyword_set = frozenset(self.keywords)
+        self.keyword_indexes = {word: i for i, word in enumerate(self.keywords)}
+        self.delimiter_indexes = {char: i for i, char in enumerate(self.delimiters)}
+        # 算术运算符和关系运算符的编码，即单词的属性值
+        self.operator_codes = dict(self.operators)
+        self.operator_codes.update(self.relational_operators)
+        # 运算符 -> (类型, 单词的值, 错误信息)
+        self.operator_table = {}
+        for op in self.operators:
+            self.operator_table[op] = (TYPE_OPERATOR, op, None)
+        for op in self.relational_operators:
+            self.operator_table[op] = (TYPE_RELATIONAL, op, None)
+        for op, message in self.error_operators.items():
+            self.operator_table[op] = ('Error', op, f"{message}: {op}")
+        self.operator_trie = OperatorTrie(self.operator_table)
+        self.lookahead = self.operator_trie.lookahead
+        # 可以开始分界符、运算符、字符串或专门报错的字符，
+        # 其他既不是空白也不是字母数字的字符都无法识别
+        self.token_starts = frozenset(self.delimiters) | frozenset(self.operator_trie.root) | frozenset(
+            self.illegal_chars) | {'"'}
+        self.digest = hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')).hexdigest()
+
+    def to_dict(self):
+        """配置文件格式的字典"""
+        return {
+            'name': self.name,
+            'keywords': self.keywords,
+            'delimiters': self.delimiters,
+            'operators': self.operators,
+            'relational_operators': self.relational_operators,
+            'error_operators': self.error_operators,
+            'illegal_chars': self.illegal_chars,
+        }
+
+    @classmethod
+    def from_dict(cls, data, default_name='profile'):
+        if not isinstance(data, dict):
+            raise ValueError("语言配置必须是JSON对象或TOML表")
+        unknown = set(data) - {'name', 'keywords', 'delimiters', 'operators', 'relational_operators',
+                               'error_operators', 'illegal_chars'}
+        if unknown:
+            raise ValueError(f"未知的配置项: {', '.join(sorted(unknown))}")
+        return cls(data.get('name', default_name), data.get('keywords', []), data.get('delimiters', []),
+                   data.get('operators', {}), data.get('relational_operators', {}),
+                   data.get('error_operators', {}), data.get('illegal_chars', {}))
+
+    def __eq__(self, other):
+        if isinstance(other, LanguageProfile):
+            return self.digest == other.digest
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"LanguageProfile({self.name!r})"
+
+
+def read_profile_data(path):
+    """读入配置文件，扩展名为.toml时按TOML解析，否则按JSON解析"""
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("读取TOML配置需要Python 3.11或tomli包，也可以改用JSON格式")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_profile(path):
+    """
+    载入并编译语言配置文件
+    同一文件只编译一次，文件被修改后重新载入
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    profile = _profile_cache.get(key)
+    if profile is None:
+        default_name = os.path.splitext(os.path.basename(path))[0]
+        profile = LanguageProfile.from_dict(read_profile_data(path), default_name)
+        _profile_cache[key] = profile
+    return profile
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+词法分析服务
+常驻进程，编译好的扫描器和语言配置在各请求之间复用，不必每次分析都重新启动Python；
+从标准输入或Unix套接字读入JSON Lines格式的请求，一次读入的多个请求作为一批分析，
+这一批的响应拼接后一次写出
+"""
+
+import os
+import sys
+import json
+import stat
+import argparse
+import socketserver
+
+from lexical_analyzer import LexicalAnalyzer, BACKENDS, MAX_ERRORS, MAX_ERROR_RATE, load_profile
+from token_cache import read_source
+from token_export import write_jsonl
+
+# 每次从输入中读入的最大字节数，读到的全部完整请求行组成一批
+READ_SIZE = 1024 * 1024
+
+# 启动时预先编译扫描器所用的源代码
+WARMUP_SOURCE = 'if (a <= 1.5) then b = "s"; end @ % 3x\n'
+
+
+class _StringCollector:
+    """收集write_jsonl写出的各行，拼接为JSON数组"""
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def json_array(self):
+        text = ''.join(self.parts)
+        # 每个单词一行，值已经转义，行内不会有换行符
+        return '[' + text[:-1].replace('\n', ', ') + ']' if text else '[]'
+
+
+class LexerService:
+    """
+    处理分析请求
+
+    每个请求是一个JSON对象：source为源代码，或path为源文件路径；
+    可选的backend、profile（语言配置文件）、recover、max_errors、max_error_rate覆盖服务的默认设置，
+    tokens为false时只返回统计结果；id原样返回，用于对应请求和响应。
+    响应也是一行JSON对象：{"id", "ok", "token_count", "error_count", "tokens"}，
+    tokens中每个单词的字段与jsonl导出格式相同；恢复模式下还有aborted和dropped_errors；
+    请求无效或无法读取文件时ok为false，error为原因
+    """
+    def __init__(self, backend='table', profile=None, recovery=False, max_errors=MAX_ERRORS,
+                 max_error_rate=MAX_ERROR_RATE):
+        self.backend = backend
+        self.profile = profile
+        self.recovery = recovery
+        self.max_errors = max_errors
+        self.max_error_rate = max_error_rate
+
+    def warm_up(self):
+        """预先编译默认设置使用的扫描器，第一个请求不必等待"""
+        for recovery in {False, self.recovery}:
+            analyzer = LexicalAnalyzer(backend=self.backend, compact=True, profile=self.profile, recovery=recovery)
+            analyzer.load_string(WARMUP_SOURCE)
+            analyzer.analyze()
+
+    def analyze(self, request):
+        """分析一个请求，返回响应的JSON文本（不含换行符）"""
+        profile = self.profile
+        if request.get('profile'):
+            profile = load_profile(request['profile'])
+        backend = request.get('backend', self.backend)
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的扫描引擎: {backend}")
+        recovery = bool(request.get('recover', self.recovery))
+        analyzer = LexicalAnalyzer(backend=backend, compact=True, profile=profile, recovery=recovery,
+                                   max_errors=request.get('max_errors', self.max_errors),
+                                   max_error_rate=request.get('max_error_rate', self.max_error_rate))
+        if 'source' in request:
+            source = request['source']
+            if not isinstance(source, str):
+                raise ValueError("source必须是字符串")
+        elif 'path' in request:
+            source = read_source(request['path'])[1]
+        else:
+            raise ValueError("请求中没有source或path")
+        analyzer.load_string(source)
+        tokens = analyzer.analyze()
+
+        fields = [f'"id": {json.dumps(request.get("id"), ensure_ascii=False)}', '"ok": true',
+                  f'"token_count": {len(tokens)}', f'"error_count": {analyzer.error_count}',
+                  f'"identifier_count": {len(analyzer.identifiers)}',
+                  f'"constant_count": {len(analyzer.constants)}']
+        if recovery:
+            fields.append(f'"aborted": {json.dumps(analyzer.aborted)}')
+            fields.append(f'"dropped_errors": {analyzer.dropped_errors}')
+        if request.get('tokens', True):
+            collector = _StringCollector()
+            write_jsonl(tokens, collector)
+            fields.append(f'"tokens": {collector.json_array()}')
+        return '{' + ', '.join(fields) + '}'
+
+    def handle_line(self, line):
+        """处理一行请求，任何错误都转换为ok为false的响应，不中断服务"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是JSON对象")
+            request_id = request.get('id')
+            return self.analyze(request)
+        except Exception as e:
+            # 一个请求中的任何异常都只影响这个请求的响应
+            return json.dumps({'id': request_id, 'ok': False, 'error': str(e) or type(e).__name__},
+                              ensure_ascii=False)
+
+    def handle_batch(self, lines):
+        """处理一批请求行，返回拼接好的响应（UTF-8字节），空行忽略"""
+        responses = [self.handle_line(line) + '\n' for line in lines if line.strip()]
+        return ''.join(responses).encode('utf-8')
+
+    def serve(self, receive, send):
+        """
+        在一个连接上处理请求，直到输入结束
+        receive(size)读入至多size字节，输入结束时返回空字节串；send(data)写出全部字节
+        """
+        buffer = bytearray()
+        while True:
+            data = receive(READ_SIZE)
+            if not data:
+                break
+            buffer += data
+            # 只有新读入的数据中有换行时才可能出现新的完整请求
+            if b'\n' not in data:
+                continue
+            cut = buffer.rindex(b'\n')
+            lines = bytes(buffer[:cut]).split(b'\n')
+            del buffer[:cut + 1]
+            response = self.handle_batch(lines)
+            if response:
+                send(response)
+        if buffer.strip():
+            send(self.handle_batch([bytes(buffer)]))
+
+
+def serve_stdio(service):
+    """从标准输入读入请求，响应写到标准输出"""
+    stdin = sys.stdin.buffer.fileno()
+    stdout = sys.stdout.buffer
+
+    def send(data):
+        stdout.write(data)
+        stdout.flush()
+
+    service.serve(lambda size: os.read(stdin, size), send)
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.service.serve(self.request.recv, self.request.sendall)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_socket(service, path):
+    """
+    在Unix套接字上提供服务，每个连接在单独的线程中处理，直到进程被中断
+    path处已有的套接字文件（如上次服务留下的）会被删除，已有其他类型的文件时拒绝启动
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{path} 已存在且不是套接字文件")
+        os.remove(path)
+    with _UnixServer(path, _ConnectionHandler) as server:
+        server.service = service
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
+def run_service(socket_path=None, backend='table', profile=None, recovery=False, max_errors=MAX_ERRORS,
+                max_error_rate=MAX_ERROR_RATE):
+    """启动服务，socket_path为None或'-'时使用标准输入输出"""
+    service = LexerService(backend, profile, recovery, max_errors, max_error_rate)
+    service.warm_up()
+    if socket_path and socket_path != '-':
+        print(f"词法分析服务: {socket_path}", file=sys.stderr)
+        serve_socket(service, socket_path)
+    else:
+        serve_stdio(service)
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description='词法分析服务')
+    parser.add_argument('--socket', metavar='PATH', help='监听的Unix套接字，默认使用标准输入输出')
+    parser.add_argument('-b', '--backend', choices=BACKENDS, default='table',
+                        help='默认的扫描引擎，默认为编译后常驻内存的表驱动扫描器')
+    parser.add_argument('-p', '--profile', metavar='FILE', help='默认的语言配置文件')
+    parser.add_argument('-r', '--recover', action='store_true', help='默认使用恢复模式')
+    args = parser.parse_args()
+
+    profile = None
+    if args.profile:
+        try:
+            profile = load_profile(args.profile)
+        except (OSError, ValueError) as e:
+            print(f"无法载入语言配置: {e}", file=sys.stderr)
+            sys.exit(1)
+    try:
+        run_service(args.socket, args.backend, profile, args.recover)
+    except FileExistsError as e:
+        print(f"无法启动服务: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,33 @@
 实现对C语言子集的词法分析
 """
 
+import os
 import sys
+import re
+import mmap
+import time
+import codecs
+from array import array
+from collections import Counter
+from operator import attrgetter, itemgetter
+from bisect import bisect_right
 
-# 单词种别码定义
-TYPE_KEYWORD = 1      # 关键字
-TYPE_DELIMITER = 2    # 分界符
-TYPE_OPERATOR = 3     # 算术运算符
-TYPE_RELATIONAL = 4   # 关系运算符
-TYPE_CONSTANT = 5     # 常数
-TYPE_IDENTIFIER = 6   # 标识符
+# 单词种别码定义在language_profile中，这里一并导出
+from language_profile import (LanguageProfile, load_profile, TYPE_KEYWORD, TYPE_DELIMITER, TYPE_OPERATOR,
+                              TYPE_RELATIONAL, TYPE_CONSTANT, TYPE_IDENTIFIER)
 
-# 表格定义
+# 各单词类型的名称
+TYPE_NAMES = {
+    TYPE_KEYWORD: "关键字",
+    TYPE_DELIMITER: "分界符",
+    TYPE_OPERATOR: "算术运算符",
+    TYPE_RELATIONAL: "关系运算符",
+    TYPE_CONSTANT: "常数",
+    TYPE_IDENTIFIER: "标识符",
+    "Error": "Error"
+}
+
+# 表格定义，即内置的语言配置
 # 关键字表
 keywords = ['do', 'end', 'for', 'if', 'printf', 'scanf', 'then', 'while', 'else']
 
@@ -42,29 +58,415 @@ relational_operators = {
     '<>': 0x05
 }
 
-# 标识符表
-identifiers = []
+# 关键字和分界符在表中的下标，扫描时直接作为单词的属性值
+keyword_indexes = {word: i for i, word in enumerate(keywords)}
+delimiter_indexes = {char: i for i, char in enumerate(delimiters)}
+
+# 内置的C子集语言配置：++识别为错误的运算符，%给出专门的错误信息
+DEFAULT_PROFILE = LanguageProfile('c-subset', keywords, delimiters, operators, relational_operators,
+                                  error_operators={'++': '非法的运算符'}, illegal_chars={'%': '非法的字符'})
+
+# 流式读取时每次读入的字符数
+CHUNK_SIZE = 64 * 1024
+
+# 可选的扫描引擎：default为逐字符的手写扫描器，table为表驱动的DFA扫描器，
+# regex为基于单个合并正则表达式的扫描器
+BACKENDS = ('default', 'table', 'regex')
+
+# print_results每次写出的行数
+PRINT_BATCH = 8192
+
+# 手写扫描器整段跳过的空白字符和标识符字符，\s和\w对str与str.isspace、str.isalnum（或下划线）一致
+WHITESPACE_RUN = re.compile(r'\s*')
+WORD_RUN = re.compile(r'\w*')
+# 换行以外的空白，恢复模式下未识别的字符之间可以隔着这样的空白
+GAP_RUN = re.compile(r'[^\S\n]*')
+
+# 恢复模式的默认限制：最多记录的错误数，以及每ERROR_RATE_WINDOW个单词中错误所占比例的上限，
+# 超过上限时认为输入不是源程序（如二进制文件），停止分析
+MAX_ERRORS = 1000
+MAX_ERROR_RATE = 0.3
+ERROR_RATE_WINDOW = 1000
+
+# 性能统计时记录耗时和消耗字符数的手写扫描器处理函数
+PROFILED_ROUTINES = ('skip_whitespace', 'handle_identifier', 'handle_number', 'handle_operator',
+                     'handle_string', 'handle_unknown_run')
+
+class LineIndex:
+    """
+    换行偏移索引，每个缓冲区用str.find（或bytes.find）建立一次，按需用二分查找把偏移换算为行号和列号
+    base_line和base_column为缓冲区首字符在源代码中的位置，流式分析时每块缓冲区接着上一块的位置建立
+    """
+    def __init__(self, content, base_line=1, base_column=1):
+        # 第一行的开始位置按base_column前移，换算列号时不必区分第一行
+        line_starts = [1 - base_column]
+        find = content.find
+        newline = '\n' if isinstance(content, str) else b'\n'
+        pos = find(newline)
+        while pos != -1:
+            line_starts.append(pos + 1)
+            pos = find(newline, pos + 1)
+        self.line_starts = line_starts
+        self.line_offset = base_line - 1
+        
+    def position(self, offset):
+        """返回偏移处字符的(行号, 列号)，均从1开始"""
+        line = bisect_right(self.line_starts, offset)
+        return line + self.line_offset, offset - self.line_starts[line - 1] + 1
+        
+    def error_position(self, offset):
+        """
+        错误单词的位置，offset为报告错误时的当前字符
+        与手写扫描器读入该字符之后的位置一致：该字符为换行符时落在下一行第0列
+        """
+        line, column = self.position(offset + 1)
+        return line, column - 1
+
+class SymbolTable:
+    """
+    符号表（标识符表、常数表）
+    按登记顺序保存单词，并用字典记录单词到下标的映射，查找和登记均为O(1)
+    """
+    def __init__(self, symbols=None):
+        self.symbols = []
+        self.indexes = {}
+        if symbols:
+            for symbol in symbols:
+                self.intern(symbol)
+                
+    def intern(self, lexeme):
+        """登记单词并返回其下标，已登记的单词直接返回原下标"""
+        index = self.indexes.get(lexeme)
+        if index is None:
+            index = len(self.symbols)
+            self.indexes[lexeme] = index
+            self.symbols.append(lexeme)
+        return index
+        
+    def index(self, lexeme):
+        """返回已登记单词的下标，与list.index一样在单词不存在时抛出ValueError"""
+        try:
+            return self.indexes[lexeme]
+        except KeyError:
+            raise ValueError(f"{lexeme!r} 不在符号表中") from None
+            
+    def clear(self):
+        self.symbols.clear()
+        self.indexes.clear()
+        
+    def __contains__(self, lexeme):
+        return lexeme in self.indexes
+        
+    def __getitem__(self, index):
+        return self.symbols[index]
+        
+    def __iter__(self):
+        return iter(self.symbols)
+        
+    def __len__(self):
+        return len(self.symbols)
+        
+    def __eq__(self, other):
+        if isinstance(other, SymbolTable):
+            return self.symbols == other.symbols
+        return self.symbols == other
+        
+    def __repr__(self):
+        return repr(self.symbols)
+
+class Token:
+    """
+    单词
+    使用__slots__保存各字段以节省内存，同时支持token['type']形式的字典式访问，
+    值为None的attribute和error_msg视为不存在的键。
+    手写扫描器生成的单词只记录偏移：line为LineIndex、column为偏移，行号和列号在首次访问时由索引换算
+    """
+    __slots__ = ('type', 'value', '_line', '_column', 'attribute', 'error_msg')
+    # 字典式访问的键
+    FIELDS = ('type', 'value', 'line', 'column', 'attribute', 'error_msg')
+    
+    def __init__(self, token_type, value, line, column, attribute=None, error_msg=None):
+        self.type = token_type
+        self.value = value
+        self._line = line
+        self._column = column
+        self.attribute = attribute
+        self.error_msg = error_msg
+        
+    def resolve(self):
+        """由换行偏移索引换算行号和列号"""
+        line_index = self._line
+        if line_index.__class__ is LineIndex:
+            if self.type == 'Error':
+                self._line, self._column = line_index.error_position(self._column)
+            else:
+                self._line, self._column = line_index.position(self._column)
+                
+    @property
+    def line(self):
+        if self._line.__class__ is LineIndex:
+            self.resolve()
+        return self._line
+        
+    @line.setter
+    def line(self, line):
+        self.resolve()
+        self._line = line
+        
+    @property
+    def column(self):
+        if self._line.__class__ is LineIndex:
+            self.resolve()
+        return self._column
+        
+    @column.setter
+    def column(self, column):
+        self.resolve()
+        self._column = column
+        
+    def __getitem__(self, key):
+        if key in Token.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+        
+    def __contains__(self, key):
+        return key in Token.FIELDS and getattr(self, key) is not None
+        
+    def get(self, key, default=None):
+        if key in self:
+            return getattr(self, key)
+        return default
+        
+    def keys(self):
+        return [key for key in Token.FIELDS if getattr(self, key) is not None]
+        
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+        
+    def __iter__(self):
+        return iter(self.keys())
+        
+    def __eq__(self, other):
+        if isinstance(other, Token):
+            return all(getattr(self, key) == getattr(other, key) for key in Token.FIELDS)
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        return NotImplemented
+        
+    def __repr__(self):
+        return f"Token({dict(self.items())!r})"
+
+# TokenStream中错误单词的种别码
+TYPE_ERROR_CODE = 0
+
+class TokenStream:
+    """
+    紧凑的单词序列，用于分析大文件
+    种别码、行号、列号、属性值分别存放在array('i')列中，单词的值登记在值表中只保存下标，
+    按下标或迭代访问时才构造Token对象，可以替代token列表使用
+    """
+    def __init__(self):
+        self.types = array('i')
+        self.values = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.attributes = array('i')
+        self.value_table = SymbolTable()
+        # 错误信息与值不同的错误单词（如++），按单词下标保存错误信息
+        self.error_msgs = {}
+        
+    def add(self, token_type, value, line, column, attribute=None, error_msg=None):
+        """按字段追加一个单词"""
+        if token_type == 'Error':
+            if error_msg != value:
+                self.error_msgs[len(self.types)] = error_msg
+            token_type = TYPE_ERROR_CODE
+        self.types.append(token_type)
+        self.values.append(self.value_table.intern(value))
+        self.lines.append(line)
+        self.columns.append(column)
+        self.attributes.append(-1 if attribute is None else attribute)
+        
+    def append(self, token):
+        """追加一个Token对象或单词字典"""
+        self.add(token['type'], token['value'], token['line'], token['column'],
+                 token.get('attribute'), token.get('error_msg'))
+        
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+            
+    def extend_stream(self, other, line_offset=0, identifier_map=None, constant_map=None):
+        """
+        整体追加另一个TokenStream的全部单词
+        行号加上line_offset，标识符和常数的属性值按给定的下标映射换算，各列按数组批量处理
+        """
+        base = len(self.types)
+        value_map = [self.value_table.intern(value) for value in other.value_table]
+        self.types.extend(other.types)
+        self.values.extend(array('i', map(value_map.__getitem__, other.values)))
+        self.lines.extend(array('i', map(line_offset.__add__, other.lines)))
+        self.columns.extend(other.columns)
+        if identifier_map is None and constant_map is None:
+            self.attributes.extend(other.attributes)
+        else:
+            self.attributes.extend(array('i', [
+                identifier_map[attribute] if token_type == TYPE_IDENTIFIER else
+                constant_map[attribute] if token_type == TYPE_CONSTANT else attribute
+                for token_type, attribute in zip(other.types, other.attributes)]))
+        for index, error_msg in other.error_msgs.items():
+            self.error_msgs[base + index] = error_msg
+            
+    def error_indexes(self):
+        """返回全部错误单词的下标，种别码转换为字节串后由bytes.find查找，不逐个构造Token"""
+        codes = bytes(self.types.tolist())
+        indexes = []
+        index = codes.find(TYPE_ERROR_CODE)
+        while index != -1:
+            indexes.append(index)
+            index = codes.find(TYPE_ERROR_CODE, index + 1)
+        return indexes
+        
+    def __len__(self):
+        return len(self.types)
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        token_type = self.types[index]
+        value = self.value_table[self.values[index]]
+        if token_type == TYPE_ERROR_CODE:
+            return Token('Error', value, self.lines[index], self.columns[index],
+                         error_msg=self.error_msgs.get(index, value))
+        return Token(token_type, value, self.lines[index], self.columns[index], self.attributes[index])
+        
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self[index]
+            
+    def __eq__(self, other):
+        if isinstance(other, (TokenStream, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+class ScanStats:
+    """
+    一次分析的性能统计
+
+    token_counts和token_times为 单词类型 -> 单词数、产生这些单词所用的秒数，对所有扫描引擎有效；
+    routine_calls、routine_times和routine_chars为手写扫描器各处理函数的调用次数、秒数和消耗的字符数；
+    *_lookups和*_misses为登记标识符表和常数表的次数和其中新增符号的次数
+    """
+    def __init__(self):
+        self.token_counts = Counter()
+        self.token_times = Counter()
+        self.routine_calls = Counter()
+        self.routine_times = Counter()
+        self.routine_chars = Counter()
+        self.scan_time = 0.0
+        self.identifier_lookups = 0
+        self.identifier_misses = 0
+        self.constant_lookups = 0
+        self.constant_misses = 0
+
+    @staticmethod
+    def hit_ratio(lookups, misses):
+        return (lookups - misses) / lookups if lookups else 0.0
+
+    def as_dict(self, type_name=str):
+        """可序列化为JSON的字典，type_name把单词类型转换为名称"""
+        return {
+            'scan_time': self.scan_time,
+            'tokens': {type_name(token_type): {'count': count, 'time': self.token_times[token_type]}
+                       for token_type, count in self.token_counts.items()},
+            'routines': {name: {'calls': calls, 'time': self.routine_times[name], 'chars': self.routine_chars[name]}
+                         for name, calls in self.routine_calls.items()},
+            'identifiers': {'lookups': self.identifier_lookups, 'misses': self.identifier_misses,
+                            'hit_ratio': self.hit_ratio(self.identifier_lookups, self.identifier_misses)},
+            'constants': {'lookups': self.constant_lookups, 'misses': self.constant_misses,
+                          'hit_ratio': self.hit_ratio(self.constant_lookups, self.constant_misses)},
+        }
+
+    def write(self, out, type_name=str):
+        """打印统计表，耗时最多的类型和处理函数在前"""
+        out.write(f"\n性能统计:\n扫描耗时: {self.scan_time * 1000:.2f}ms\n")
+        out.write(f"{'单词类型':<15}{'单词数':<12}{'耗时(ms)':<12}{'平均(ns/单词)':<15}\n")
+        for token_type, seconds in self.token_times.most_common():
+            count = self.token_counts[token_type]
+            out.write(f"{type_name(token_type):<15}{count:<12}{seconds * 1000:<12.2f}{seconds * 1e9 / count:<15.0f}\n")
+        if self.routine_calls:
+            out.write(f"{'处理函数':<20}{'调用次数':<12}{'耗时(ms)':<12}{'字符数':<12}\n")
+            for name, seconds in self.routine_times.most_common():
+                out.write(f"{name:<20}{self.routine_calls[name]:<12}{seconds * 1000:<12.2f}"
+                          f"{self.routine_chars[name]:<12}\n")
+        for table, lookups, misses in (('标识符表', self.identifier_lookups, self.identifier_misses),
+                                       ('常数表', self.constant_lookups, self.constant_misses)):
+            out.write(f"{table}: 登记{lookups}次，新增{misses}个，命中率{self.hit_ratio(lookups, misses):.1%}\n")
 
-# 常数表
-constants = []
 
 class LexicalAnalyzer:
-    def __init__(self, input_file=None):
+    # 已编译的扫描器，按 (引擎名称, 语言配置的散列值, 是否为恢复模式) 缓存，所有实例共享
+    _scanners = {}
+
+    def __init__(self, input_file=None, backend='default', compact=False, profile=None,
+                 recovery=False, max_errors=MAX_ERRORS, max_error_rate=MAX_ERROR_RATE, collect_stats=False):
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的扫描引擎: {backend}")
+        # 语言配置，默认为内置的C子集
+        self.profile = profile or DEFAULT_PROFILE
         self.input_file = input_file
+        self.backend = backend
         self.content = ""
         self.position = 0
+        # content首字符在源代码中的偏移、行号和列号，流式读入新块时随之前移
+        self.content_offset = 0
         self.line = 1
         self.column = 1
+        # 手写扫描器使用的换行偏移索引，扫描时不逐字符维护行列号，生成单词时由索引换算
+        self.line_index = None
         self.current_char = None
-        self.tokens = []
+        # 正在收集的单词在content中的开始位置
+        self.lexeme_start = None
+        # 内存映射的源文件，为None时表示未使用内存映射
+        self.mapped = None
+        # 流式读取的输入流，为None时表示源代码已全部在content中
+        self.stream = None
+        self.chunk_size = CHUNK_SIZE
+        self.decoder = None
+        # compact为True时使用紧凑的TokenStream保存单词序列
+        self.tokens = TokenStream() if compact else []
         self.error_count = 0
+        # 每个分析器拥有独立的标识符表和常数表
+        self.identifiers = SymbolTable()
+        self.constants = SymbolTable()
+        # 恢复模式：连续的未识别字符合并为一个错误单词，最多记录max_errors个错误，
+        # 错误率超过max_error_rate时停止分析；两项限制为None时不限制
+        self.recovery = recovery
+        self.max_errors = max_errors
+        self.max_error_rate = max_error_rate
+        # 超过上限未记录的错误数，以及是否因错误率过高停止了分析
+        self.dropped_errors = 0
+        self.aborted = False
+        # collect_stats为True时记录各类单词和各处理函数的性能统计，见ScanStats
+        self.stats = None
+        if collect_stats:
+            self.stats = ScanStats()
+            for name in PROFILED_ROUTINES:
+                self.instrument_routine(name)
         
     def load_file(self, input_file):
         """从文件中加载源代码"""
         try:
             with open(input_file, 'r', encoding='utf-8') as f:
                 self.content = f.read()
+            self.close_mmap()
+            self.stream = None
             self.position = 0
+            self.content_offset = 0
             self.line = 1
             self.column = 1
             return True
@@ -75,68 +477,449 @@ class LexicalAnalyzer:
     def load_string(self, content):
         """从字符串中加载源代码"""
         self.content = content
+        self.stream = None
+        self.position = 0
+        self.content_offset = 0
+        self.line = 1
+        self.column = 1
+        
+    def load_mmap(self, path):
+        """
+        以内存映射方式加载源文件
+        只含ASCII字符的文件由正则扫描器直接在映射的字节上扫描，不再整体读入和解码，
+        单词的值以切片方式取出；含非ASCII字符的文件按UTF-8解码后按常规方式分析
+        """
+        self.close_mmap()
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    # 空文件无法映射
+                    self.load_string("")
+                    return True
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception as e:
+            print(f"无法打开文件: {e}")
+            return False
+            
+        if re.search(rb'[\x80-\xff]', mapped):
+            self.load_string(mapped[:].decode('utf-8'))
+            mapped.close()
+            return True
+            
+        self.load_string("")
+        self.mapped = mapped
+        return True
+        
+    def close_mmap(self):
+        """释放内存映射"""
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+            
+    def load_stream(self, fileobj, chunk_size=CHUNK_SIZE):
+        """
+        从输入流中加载源代码
+        源代码按chunk_size分块读入，分析时只在内存中保留当前块和跨块的单词，
+        二进制流按UTF-8增量解码
+        """
+        self.close_mmap()
+        self.content = ""
+        self.stream = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = None
         self.position = 0
+        self.content_offset = 0
         self.line = 1
         self.column = 1
         
+    def read_chunk(self, size):
+        """从输入流读入一块源代码，输入流读完后返回空字符串"""
+        while True:
+            chunk = self.stream.read(size)
+            if not isinstance(chunk, bytes):
+                return chunk
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder('utf-8')()
+            text = self.decoder.decode(chunk, final=not chunk)
+            # 块末尾只有半个多字节字符时继续读入
+            if text or not chunk:
+                return text
+                
+    def fill_buffer(self):
+        """当前块读完时读入下一块，丢弃已分析的部分；没有更多输入时返回False"""
+        if self.stream is None:
+            return False
+        chunk = self.read_chunk(self.chunk_size)
+        if not chunk:
+            self.stream = None
+            return False
+        # 保留正在收集的单词
+        keep = self.position if self.lexeme_start is None else self.lexeme_start
+        if self.line_index is not None:
+            self.line, self.column = self.line_index.position(keep)
+        self.content = self.content[keep:] + chunk
+        self.content_offset += keep
+        self.position -= keep
+        if self.lexeme_start is not None:
+            self.lexeme_start = 0
+        self.line_index = LineIndex(self.content, self.line, self.column)
+        return True
+        
     def get_char(self):
         """获取当前字符并移动指针到下一个位置"""
-        if self.position >= len(self.content):
+        if self.position >= len(self.content) and not self.fill_buffer():
             self.current_char = None
             return None
             
         self.current_char = self.content[self.position]
         self.position += 1
-        
-        # 更新行号和列号
-        if self.current_char == '\n':
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-            
         return self.current_char
         
+    def skip_match(self, pattern):
+        """
+        从下一个字符开始跳过与pattern匹配的连续字符，current_char停在之后的第一个字符上
+        只移动位置，流式读取时匹配到块末尾则读入下一块后继续匹配
+        """
+        while True:
+            content = self.content
+            position = pattern.match(content, self.position).end()
+            if position < len(content):
+                self.current_char = content[position]
+                self.position = position + 1
+                return self.current_char
+            self.position = position
+            if not self.fill_buffer():
+                return self.get_char()
+        
+    def skip_to(self, char):
+        """跳到下一个char处，current_char停在该字符上；之后没有char时停在输入末尾"""
+        while True:
+            index = self.content.find(char, self.position)
+            if index != -1:
+                self.position = index
+                break
+            self.position = len(self.content)
+            if not self.fill_buffer():
+                break
+        return self.get_char()
+        
+    def mark_lexeme_start(self):
+        """记录当前字符为单词的开始位置，读入新块时保留从该位置开始的内容"""
+        self.lexeme_start = self.position - 1
+        
+    def take_lexeme(self):
+        """以切片方式取出从开始位置到当前字符之前的单词"""
+        end = self.position - 1 if self.current_char is not None else self.position
+        lexeme = self.content[self.lexeme_start:end]
+        self.lexeme_start = None
+        return lexeme
+        
     def peek_char(self):
         """预读下一个字符，不移动指针"""
-        if self.position >= len(self.content):
+        if self.position >= len(self.content) and not self.fill_buffer():
             return None
         return self.content[self.position]
         
     def skip_whitespace(self):
         """跳过空白字符（空格、制表符、换行符）"""
-        while self.current_char is not None and self.current_char.isspace():
-            self.get_char()
+        if self.current_char is None or not self.current_char.isspace():
+            return
+        content = self.content
+        position = self.position
+        if position < len(content) and not content[position].isspace():
+            # 单个空白字符最常见，直接读入下一个字符，不必整段匹配
+            self.current_char = content[position]
+            self.position = position + 1
+        else:
+            self.skip_match(WHITESPACE_RUN)
             
     def handle_error(self, error_msg):
-        """处理错误"""
+        """处理错误，位置为当前字符（已到输入末尾时为最后一个字符）"""
         self.error_count += 1
-        return {
-            'type': 'Error',
-            'value': error_msg,
-            'line': self.line,
-            'column': self.column - 1,
-            'error_msg': error_msg
-        }
+        return Token('Error', error_msg, self.line_index, self.position - 1, error_msg=error_msg)
         
     def is_keyword(self, word):
         """检查单词是否为关键字"""
-        return word in keywords
+        return word in self.profile.keyword_indexes
         
     def is_delimiter(self, char):
         """检查字符是否为分界符"""
-        return char in delimiters
+        return char in self.profile.delimiter_indexes
         
     def is_operator(self, char):
         """检查字符是否为算术运算符"""
-        return char in operators
+        return char in self.profile.operators
         
     def is_relational_operator_start(self, char):
         """检查字符是否为关系运算符的开始"""
-        return char in ['<', '=', '>']
+        return any(op[0] == char for op in self.profile.relational_operators)
+        
+    def get_scanner(self, backend=None):
+        """获取指定引擎（默认为当前引擎）对应的已编译扫描器"""
+        backend = backend or self.backend
+        key = (backend, self.profile.digest, self.recovery)
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            if backend == 'regex':
+                from regex_scanner import RegexScanner as scanner_class
+            else:
+                from dfa_scanner import DfaScanner as scanner_class
+            scanner = scanner_class(self.profile, self.recovery)
+            self._scanners[key] = scanner
+        return scanner
+        
+    def scan_buffer(self, content, final=True, base_line=1, base_column=1):
+        """
+        使用已编译的扫描器分析一段缓冲区，结果与手写扫描器一致
+        
+        逐个产生 (类型, 值, 行号, 列号, 属性值, 错误信息) 字段元组；
+        base_line和base_column为缓冲区首字符在源代码中的位置。
+        final为False时，延伸到缓冲区末尾的单词可能还未结束，不产生该单词，
+        生成器返回 (已分析的字符数, 下一个字符的行号, 列号)
+        """
+        length = len(content)
+        line_index = LineIndex(content, base_line, base_column)
+        line_starts = line_index.line_starts
+        line_count = len(line_starts)
+        token_line = 1
+        line_start = line_starts[0]
+        next_line_start = line_starts[1] if line_count > 1 else length + 1
+        intern_identifier = self.identifiers.intern
+        intern_constant = self.constants.intern
+        keyword_index = self.profile.keyword_indexes
+        delimiter_index = self.profile.delimiter_indexes
+        operator_codes = self.profile.operator_codes
+        # 最长匹配运算符时可能多读入若干字符，结束于这个位置及之后的单词需等待后续内容
+        safe_end = length - self.profile.lookahead
+        # 恢复模式下一段未识别的字符之后只有空白直到缓冲区末尾时，这一段可能在下一块中继续
+        check_gap = self.recovery and not final
+        consumed = 0
+        
+        if isinstance(content, str):
+            records = self.get_scanner().scan(content)
+        else:
+            # ASCII字节缓冲区只能由正则扫描器直接扫描
+            records = self.get_scanner('regex').scan_bytes(content)
+            
+        for token_type, value, anchor, end, error_msg in records:
+            if end >= safe_end and not final:
+                break
+            if check_gap and token_type == 'Error' and GAP_RUN.match(content, end).end() == length:
+                break
+            consumed = end
+            
+            # 行列号由换行偏移索引换算，只在跨行时查找索引，不再逐字符维护
+            if anchor >= next_line_start:
+                token_line = bisect_right(line_starts, anchor)
+                line_start = line_starts[token_line - 1]
+                if token_line < line_count:
+                    next_line_start = line_starts[token_line]
+                else:
+                    next_line_start = length + 1
+            token_column = anchor - line_start + 1
+            line = token_line + base_line - 1
+            
+            if token_type == 'Error':
+                self.error_count += 1
+                line, token_column = line_index.error_position(anchor)
+                yield ('Error', value, line, token_column, None, error_msg)
+                continue
+                
+            if token_type == TYPE_IDENTIFIER:
+                attribute = intern_identifier(value)
+            elif token_type == TYPE_CONSTANT:
+                attribute = intern_constant(value)
+            elif token_type == TYPE_KEYWORD:
+                attribute = keyword_index[value]
+            elif token_type == TYPE_DELIMITER:
+                attribute = delimiter_index[value]
+            else:
+                attribute = operator_codes[value]
+            yield (token_type, value, line, token_column, attribute, None)
+            
+        # 未分析部分首字符的位置
+        next_line, next_column = line_index.position(consumed)
+        return consumed, next_line, next_column
+        
+    def iter_scanner_fields(self):
+        """使用已编译的扫描器分析源代码，逐个产生单词的字段元组"""
+        if self.mapped is not None:
+            yield from self.scan_buffer(self.mapped)
+            self.close_mmap()
+            return
+            
+        if self.stream is None:
+            if self.position > 0:
+                # 缓冲区已经分析过
+                return
+            yield from self.scan_buffer(self.content)
+            self.position = len(self.content)
+            return
+            
+        # 流式读取：每块中延伸到块末尾的单词留到与下一块拼接后再分析
+        carry = self.content[self.position:]
+        line, column = self.line, self.column
+        size = self.chunk_size
+        while True:
+            chunk = self.read_chunk(size)
+            final = not chunk
+            content = carry + chunk
+            if content:
+                consumed, line, column = yield from self.scan_buffer(content, final, line, column)
+            if final:
+                break
+            carry = content[consumed:]
+            # 单个单词跨越多块时加倍读入，避免反复扫描同一段内容
+            size = size * 2 if consumed == 0 else self.chunk_size
+        self.stream = None
+        self.content = ""
+        self.position = 0
+        
+    def analyze(self, jobs=1):
+        """
+        执行词法分析，生成token序列
+        jobs大于1时把已加载的源代码切分为多段，在多个进程中并行分析后拼接，结果与顺序分析一致
+        """
+        # 恢复模式的错误数和错误率、性能统计都按整个输入的顺序统计，不并行分析
+        if (jobs > 1 and self.stream is None and self.mapped is None and self.position == 0 and
+                not self.recovery and self.stats is None):
+            from parallel_lexer import analyze_parallel
+            return analyze_parallel(self, jobs)
+            
+        if self.backend != 'default' or self.mapped is not None:
+            records = self.iter_scanner_fields()
+            if self.stats is not None:
+                records = self.profile_tokens(records, itemgetter(0))
+            if self.recovery:
+                records = self.limit_errors(records, itemgetter(0))
+            if isinstance(self.tokens, TokenStream):
+                add_token = self.tokens.add
+                for fields in records:
+                    add_token(*fields)
+            else:
+                append = self.tokens.append
+                for fields in records:
+                    append(Token(*fields))
+            return self.tokens
+            
+        for token in self.iter_tokens():
+            self.tokens.append(token)
+        return self.tokens
+        
+    def iter_tokens(self):
+        """
+        逐个产生单词的生成器
+        单词识别出来即交给调用者，不保存在self.tokens中，
+        与load_stream配合可以用常数内存分析任意大的文件
+        """
+        if self.backend != 'default' or self.mapped is not None:
+            tokens = (Token(*fields) for fields in self.iter_scanner_fields())
+        else:
+            tokens = self.iter_handwritten_tokens()
+        if self.stats is not None:
+            tokens = self.profile_tokens(tokens, attrgetter('type'))
+        if self.recovery:
+            tokens = self.limit_errors(tokens, attrgetter('type'))
+        return tokens
+        
+    def limit_errors(self, items, get_type):
+        """
+        恢复模式下对单词序列施加错误限制
+        
+        items为单词或字段元组的序列，get_type取出其类型；超过max_errors的错误不再产生，
+        只计入dropped_errors。每ERROR_RATE_WINDOW个单词检查一次错误所占的比例，
+        超过max_error_rate时设置aborted并停止分析，不再读入剩余的输入
+        """
+        max_errors = self.max_errors
+        max_error_rate = self.max_error_rate
+        recorded = 0
+        window_tokens = 0
+        window_errors = 0
+        for item in items:
+            window_tokens += 1
+            if get_type(item) == 'Error':
+                window_errors += 1
+                if max_errors is not None and recorded >= max_errors:
+                    self.dropped_errors += 1
+                else:
+                    recorded += 1
+                    yield item
+            else:
+                yield item
+            if window_tokens == ERROR_RATE_WINDOW:
+                if max_error_rate is not None and window_errors > max_error_rate * window_tokens:
+                    self.aborted = True
+                    items.close()
+                    self.close_mmap()
+                    self.stream = None
+                    return
+                window_tokens = 0
+                window_errors = 0
+        
+    def profile_tokens(self, items, get_type):
+        """
+        性能统计：按单词类型记录单词数和产生每个单词所用的时间
+        分析结束（或被提前关闭）时由符号表的大小得到新增符号的个数
+        """
+        stats = self.stats
+        token_counts = stats.token_counts
+        token_times = stats.token_times
+        clock = time.perf_counter
+        identifiers = len(self.identifiers)
+        constants = len(self.constants)
+        iterator = iter(items)
+        try:
+            while True:
+                begin = clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    # 最后一个单词之后扫描到输入末尾的时间
+                    stats.scan_time += clock() - begin
+                    break
+                seconds = clock() - begin
+                token_type = get_type(item)
+                stats.scan_time += seconds
+                token_counts[token_type] += 1
+                token_times[token_type] += seconds
+                yield item
+        finally:
+            # 每个标识符和常数单词登记一次符号表，未命中即新增的符号
+            stats.identifier_lookups = token_counts[TYPE_IDENTIFIER]
+            stats.identifier_misses += len(self.identifiers) - identifiers
+            stats.constant_lookups = token_counts[TYPE_CONSTANT]
+            stats.constant_misses += len(self.constants) - constants
+            
+    def instrument_routine(self, name):
+        """性能统计：用记录调用次数、耗时和消耗字符数的包装函数替换本实例的处理函数"""
+        routine = getattr(self, name)
+        stats = self.stats
+        clock = time.perf_counter
+        
+        def profiled():
+            begin_offset = self.source_offset()
+            begin = clock()
+            result = routine()
+            stats.routine_times[name] += clock() - begin
+            stats.routine_calls[name] += 1
+            stats.routine_chars[name] += self.source_offset() - begin_offset
+            return result
+            
+        setattr(self, name, profiled)
+        
+    def source_offset(self):
+        """当前字符在源代码中的偏移，已到输入末尾时为源代码的长度"""
+        return self.content_offset + self.position - (self.current_char is not None)
+        
+    def iter_handwritten_tokens(self):
+        """手写扫描器逐个产生单词"""
+        delimiter_index = self.profile.delimiter_indexes
+        operator_trie = self.profile.operator_trie
+        single_operators = operator_trie.single
+        operator_codes = self.profile.operator_codes
+        illegal_chars = self.profile.illegal_chars
         
-    def analyze(self):
-        """执行词法分析，生成token序列"""
+        self.line_index = LineIndex(self.content, self.line, self.column)
         self.get_char()  # 读取第一个字符
         
         while self.current_char is not None:
@@ -148,173 +931,117 @@ class LexicalAnalyzer:
             # 处理标识符和关键字
             if self.current_char.isalpha() or self.current_char == '_':
                 token = self.handle_identifier()
-                self.tokens.append(token)
+                yield token
                 continue
                 
             # 处理数字
             if self.current_char.isdigit():
                 token = self.handle_number()
-                self.tokens.append(token)
+                yield token
                 continue
                 
             # 处理分界符
-            if self.is_delimiter(self.current_char):
-                token = {
-                    'type': TYPE_DELIMITER,
-                    'value': self.current_char,
-                    'line': self.line,
-                    'column': self.column - 1
-                }
-                self.tokens.append(token)
+            if self.current_char in delimiter_index:
+                token = Token(TYPE_DELIMITER, self.current_char, self.line_index, self.position - 1,
+                              delimiter_index[self.current_char])
+                yield token
                 self.get_char()
                 continue
                 
-            # 处理算术运算符
-            if self.is_operator(self.current_char):
-                # 处理特殊情况：++
-                if self.current_char == '+' and self.peek_char() == '+':
-                    start_column = self.column - 1
-                    token = {
-                        'type': 'Error',
-                        'value': '++',
-                        'line': self.line,
-                        'column': start_column,
-                        'error_msg': "非法的运算符: ++"
-                    }
-                    self.get_char()  # 跳过第一个+
-                    self.get_char()  # 跳过第二个+
-                    self.error_count += 1
-                elif self.current_char == '&':
-                    # 处理取地址符号
-                    start_column = self.column - 1
-                    token = {
-                        'type': TYPE_OPERATOR,
-                        'value': '&',
-                        'line': self.line,
-                        'column': start_column
-                    }
-                    self.get_char()
+            # 处理不是更长运算符前缀的单字符运算符，不必查看下一个字符
+            if self.current_char in single_operators:
+                token_type, value, error_msg = single_operators[self.current_char]
+                if error_msg is None:
+                    token = Token(token_type, value, self.line_index, self.position - 1, operator_codes[value])
                 else:
-                    token = {
-                        'type': TYPE_OPERATOR,
-                        'value': self.current_char,
-                        'line': self.line,
-                        'column': self.column - 1
-                    }
-                    self.get_char()
-                
-                self.tokens.append(token)
+                    self.error_count += 1
+                    token = Token('Error', value, self.line_index, self.position - 1, error_msg=error_msg)
+                yield token
+                self.get_char()
                 continue
                 
-            # 处理关系运算符
-            if self.is_relational_operator_start(self.current_char):
-                token = self.handle_relational_operator()
-                self.tokens.append(token)
+            # 处理多字符运算符
+            if self.current_char in operator_trie:
+                yield self.handle_operator()
                 continue
                 
             # 处理字符串常量
             if self.current_char == '"':
                 token = self.handle_string()
-                self.tokens.append(token)
+                yield token
                 continue
                 
-            # 处理特殊情况：%
-            if self.current_char == '%':
-                token = self.handle_error(f"非法的字符: %")
-                self.tokens.append(token)
+            # 处理给出专门错误信息的字符
+            if self.current_char in illegal_chars:
+                token = self.handle_error(f"{illegal_chars[self.current_char]}: {self.current_char}")
+                yield token
                 self.get_char()
                 continue
                 
             # 处理未识别的字符
+            if self.recovery:
+                yield self.handle_unknown_run()
+                continue
             error_token = self.handle_error(f"未识别的字符: {self.current_char}")
-            self.tokens.append(error_token)
+            yield error_token
             self.get_char()
             
-        return self.tokens
         
     def handle_string(self):
         """处理字符串常量"""
         # 保存当前位置信息
-        start_line = self.line
-        start_column = self.column - 1
+        line_index = self.line_index
+        start = self.position - 1
         
-        # 收集字符串字符
-        lexeme = self.current_char  # 包含开始的双引号
-        self.get_char()
+        # 收集字符串字符，包含开始的双引号
+        self.mark_lexeme_start()
+        self.skip_to('"')
         
-        while self.current_char is not None and self.current_char != '"':
-            lexeme += self.current_char
-            self.get_char()
-            
         if self.current_char == '"':
-            lexeme += self.current_char
             self.get_char()
+            lexeme = self.take_lexeme()
             
             # 将字符串常量加入常数表
-            if lexeme not in constants:
-                constants.append(lexeme)
-                
-            return {
-                'type': TYPE_CONSTANT,
-                'value': lexeme,
-                'line': start_line,
-                'column': start_column
-            }
+            return Token(TYPE_CONSTANT, lexeme, line_index, start, self.constants.intern(lexeme))
         else:
             # 未闭合的字符串
+            lexeme = self.take_lexeme()
             return self.handle_error(f"未闭合的字符串常量: {lexeme}")
             
     def handle_identifier(self):
         """处理标识符和关键字"""
         # 保存当前位置信息
-        start_line = self.line
-        start_column = self.column - 1
+        line_index = self.line_index
+        start = self.position - 1
         
         # 收集标识符字符
-        lexeme = ""
-        while (self.current_char is not None and 
-               (self.current_char.isalnum() or self.current_char == '_')):
-            lexeme += self.current_char
-            self.get_char()
+        self.mark_lexeme_start()
+        self.skip_match(WORD_RUN)
+        lexeme = self.take_lexeme()
             
         # 判断是否为关键字
         if self.is_keyword(lexeme):
-            return {
-                'type': TYPE_KEYWORD,
-                'value': lexeme,
-                'line': start_line,
-                'column': start_column
-            }
+            return Token(TYPE_KEYWORD, lexeme, line_index, start, self.profile.keyword_indexes[lexeme])
         else:
             # 是标识符，需要登记到标识符表中
-            if lexeme not in identifiers:
-                identifiers.append(lexeme)
-            
-            return {
-                'type': TYPE_IDENTIFIER,
-                'value': lexeme,
-                'line': start_line,
-                'column': start_column
-            }
+            return Token(TYPE_IDENTIFIER, lexeme, line_index, start, self.identifiers.intern(lexeme))
             
     def handle_number(self):
         """处理数字常量"""
         # 保存当前位置信息
-        start_line = self.line
-        start_column = self.column - 1
+        line_index = self.line_index
+        start = self.position - 1
         
         # 收集数字字符
-        lexeme = ""
+        self.mark_lexeme_start()
         is_valid = True
         
         # 处理整数部分
         while self.current_char is not None and self.current_char.isdigit():
-            lexeme += self.current_char
             self.get_char()
             
         # 处理小数部分
         if self.current_char == '.':
-            lexeme += self.current_char
             self.get_char()
             
             # 小数点后必须有数字
@@ -322,18 +1049,19 @@ class LexicalAnalyzer:
                 is_valid = False
                 
             while self.current_char is not None and self.current_char.isdigit():
-                lexeme += self.current_char
                 self.get_char()
                 
+        lexeme = self.take_lexeme()
+        
         # 检查数字后面是否有字母，如果有则是非法的
         if (self.current_char is not None and 
             (self.current_char.isalpha() or self.current_char == '_')):
             is_valid = False
-            error_lexeme = lexeme + self.current_char
-            while (self.current_char is not None and 
-                  (self.current_char.isalnum() or self.current_char == '_')):
-                error_lexeme += self.current_char
-                self.get_char()
+            self.mark_lexeme_start()
+            self.skip_match(WORD_RUN)
+            tail = self.take_lexeme()
+            # 与原实现一致，错误信息中第一个非法字符出现两次
+            error_lexeme = lexeme + tail[0] + tail
                 
             return self.handle_error(f"非法的数字常量: {error_lexeme}")
             
@@ -341,132 +1069,217 @@ class LexicalAnalyzer:
             return self.handle_error(f"非法的数字常量: {lexeme}")
             
         # 将常数加入常数表
-        if lexeme not in constants:
-            constants.append(lexeme)
-            
-        return {
-            'type': TYPE_CONSTANT,
-            'value': lexeme,
-            'line': start_line,
-            'column': start_column
-        }
+        return Token(TYPE_CONSTANT, lexeme, line_index, start, self.constants.intern(lexeme))
         
-    def handle_relational_operator(self):
-        """处理关系运算符"""
+    def handle_operator(self):
+        """
+        按最长匹配处理运算符
+        沿运算符字典树向前查看，只消耗匹配到的运算符，不回退；
+        当前字符只是运算符的前缀而不构成运算符时报告未识别的字符
+        """
+        # 流式读取时保证缓冲区中有最长运算符所需的字符
+        operator_trie = self.profile.operator_trie
+        if self.stream is not None:
+            self.mark_lexeme_start()
+            while len(self.content) - self.lexeme_start < operator_trie.max_length and self.fill_buffer():
+                pass
+            self.lexeme_start = None
+            
         # 保存当前位置信息
-        start_line = self.line
-        start_column = self.column - 1
-        
-        first_char = self.current_char
-        self.get_char()  # 移动到下一个字符
-        
-        # 检查双字符运算符
-        if first_char == '<' and self.current_char == '=':
-            self.get_char()  # 移动到下一个字符
-            return {
-                'type': TYPE_RELATIONAL,
-                'value': '<=',
-                'line': start_line,
-                'column': start_column
-            }
-        elif first_char == '>' and self.current_char == '=':
-            self.get_char()  # 移动到下一个字符
-            return {
-                'type': TYPE_RELATIONAL,
-                'value': '>=',
-                'line': start_line,
-                'column': start_column
-            }
-        elif first_char == '<' and self.current_char == '>':
-            self.get_char()  # 移动到下一个字符
-            return {
-                'type': TYPE_RELATIONAL,
-                'value': '<>',
-                'line': start_line,
-                'column': start_column
-            }
-        else:
-            # 单字符运算符
-            op = first_char
-            if op in relational_operators:
-                return {
-                    'type': TYPE_RELATIONAL,
-                    'value': op,
-                    'line': start_line,
-                    'column': start_column
-                }
-            else:
-                return self.handle_error(f"非法的关系运算符: {op}")
-                
-    def get_type_name(self, type_code):
+        line_index = self.line_index
+        start = self.position - 1
+        
+        lexeme = operator_trie.match(self.content, start)
+        if lexeme is None:
+            token = self.handle_error(f"未识别的字符: {self.current_char}")
+            self.get_char()
+            return token
+            
+        # 不逐字符维护行列号，直接移到运算符之后
+        self.position = start + len(lexeme)
+        self.get_char()
+        token_type, value, error_msg = operator_trie.table[lexeme]
+        if error_msg is not None:
+            self.error_count += 1
+            return Token('Error', value, line_index, start, error_msg=error_msg)
+        return Token(token_type, value, line_index, start, self.profile.operator_codes[value])
+        
+    def handle_unknown_run(self):
+        """
+        恢复模式下处理一段连续的未识别字符
+        字符之间可以隔着换行以外的空白，整段合并为一个错误单词，位置为第一个字符，
+        末尾的空白不属于这一段
+        """
+        token_starts = self.profile.token_starts
+        self.mark_lexeme_start()
+        run_length = 1
+        while True:
+            char = self.peek_char()
+            if char is None or char == '\n':
+                break
+            if not char.isspace():
+                if char.isalpha() or char == '_' or char.isdigit() or char in token_starts:
+                    break
+                run_length = self.position + 1 - self.lexeme_start
+            self.position += 1
+            
+        start = self.lexeme_start
+        self.lexeme_start = None
+        self.position = start + run_length
+        error_msg = f"未识别的字符: {self.content[start:self.position]}"
+        self.error_count += 1
+        token = Token('Error', error_msg, self.line_index, start, error_msg=error_msg)
+        self.get_char()
+        return token
+        
+    @staticmethod
+    def get_type_name(type_code):
         """获取类型名称"""
-        type_names = {
-            TYPE_KEYWORD: "关键字",
-            TYPE_DELIMITER: "分界符",
-            TYPE_OPERATOR: "算术运算符",
-            TYPE_RELATIONAL: "关系运算符",
-            TYPE_CONSTANT: "常数",
-            TYPE_IDENTIFIER: "标识符",
-            "Error": "Error"
-        }
-        return type_names.get(type_code, "未知类型")
+        return TYPE_NAMES.get(type_code, "未知类型")
         
     def get_token_attribute(self, token):
         """获取token的属性值"""
+        # 扫描时已经记录了属性值
+        if 'attribute' in token:
+            return token['attribute']
         if token['type'] == TYPE_KEYWORD:
-            return keywords.index(token['value'])
+            return self.profile.keyword_indexes[token['value']]
         elif token['type'] == TYPE_DELIMITER:
-            return delimiters.index(token['value'])
+            return self.profile.delimiter_indexes[token['value']]
         elif token['type'] == TYPE_OPERATOR:
-            return operators.get(token['value'], 0)
+            return self.profile.operators.get(token['value'], 0)
         elif token['type'] == TYPE_RELATIONAL:
-            return relational_operators.get(token['value'], 0)
+            return self.profile.relational_operators.get(token['value'], 0)
         elif token['type'] == TYPE_CONSTANT:
-            return constants.index(token['value'])
+            return self.constants.index(token['value'])
         elif token['type'] == TYPE_IDENTIFIER:
-            return identifiers.index(token['value'])
+            return self.identifiers.index(token['value'])
         else:
             return "Error"
             
-    def print_results(self):
-        """打印词法分析结果"""
-        print(f"{'单词':<15}{'二元序列':<25}{'类型':<15}{'位置（行，列）':<15}")
-        print("-" * 70)
+    def format_prefix(self, token_type, value):
+        """结果表中一行位置之前的部分，只由种别码和单词的值决定"""
+        if token_type == 'Error' or token_type == TYPE_ERROR_CODE:
+            type_name = "Error"
+            attribute = "Error"
+            return f"{value:<15}({type_name},{attribute}){' ':<10}{type_name:<15}"
+        type_name = self.get_type_name(token_type)
+        attribute = value
+        return f"{value:<15}({token_type},{attribute}){' ':<10}{type_name:<15}"
         
-        for token in self.tokens:
-            if token['type'] == 'Error':
-                type_name = "Error"
-                attribute = "Error"
-                print(f"{token['value']:<15}({type_name},{attribute}){' ':<10}{type_name:<15}({token['line']}, {token['column']})")
-            else:
-                type_name = self.get_type_name(token['type'])
-                attribute = token['value']
-                print(f"{token['value']:<15}({token['type']},{attribute}){' ':<10}{type_name:<15}({token['line']}, {token['column']})")
+    def iter_result_rows(self):
+        """
+        产生结果表的各行（含换行符）
+        同一单词的行前缀只格式化一次，紧凑单词序列按列读取，不逐个构造Token
+        """
+        prefixes = {}
+        tokens = self.tokens
+        if isinstance(tokens, TokenStream):
+            for token_type, value_id, line, column in zip(tokens.types, tokens.values, tokens.lines, tokens.columns):
+                key = (token_type, value_id)
+                prefix = prefixes.get(key)
+                if prefix is None:
+                    prefix = prefixes[key] = self.format_prefix(token_type, tokens.value_table[value_id])
+                yield f"{prefix}({line}, {column})\n"
+            return
+        for token in tokens:
+            key = (token.type, token.value)
+            prefix = prefixes.get(key)
+            if prefix is None:
+                prefix = prefixes[key] = self.format_prefix(token.type, token.value)
+            yield f"{prefix}({token.line}, {token.column})\n"
+            
+    def print_results(self, out=None, batch_size=PRINT_BATCH):
+        """打印词法分析结果，各行先在列表中拼接，每batch_size行写出一次"""
+        out = out or sys.stdout
+        out.write(f"{'单词':<15}{'二元序列':<25}{'类型':<15}{'位置（行，列）':<15}\n")
+        out.write("-" * 70 + "\n")
+        
+        batch = []
+        for row in self.iter_result_rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                out.write(''.join(batch))
+                batch.clear()
+        out.write(''.join(batch))
+        
+    def print_statistics(self, out=None):
+        """打印统计信息"""
+        out = out or sys.stdout
+        out.write("\n分析统计:\n"
+                  f"标识符表: {self.identifiers}\n"
+                  f"常数表: {self.constants}\n"
+                  f"错误数量: {self.error_count}\n")
+        if self.dropped_errors:
+            out.write(f"超过上限未记录的错误: {self.dropped_errors}\n")
+        if self.aborted:
+            out.write("错误率过高，输入可能不是源程序，已停止分析\n")
+        if self.stats is not None:
+            self.stats.write(out, self.get_type_name)
 
-def main():
+    def export_results(self, output_format, out):
+        """
+        以机器可读的格式写出单词序列（jsonl、csv、columnar，见token_export.py）
+        out为文本流，columnar格式为二进制流
+        """
+        from token_export import export_tokens
+        export_tokens(self.tokens, output_format, out)
+
+def main(backend='default', jobs=1, output_format='text', output_path=None, stats_only=False, profile=None,
+         recovery=False, max_errors=MAX_ERRORS, max_error_rate=MAX_ERROR_RATE, collect_stats=False):
     # 检查命令行参数
     if len(sys.argv) < 2:
         print("用法: python lexical_analyzer.py <输入文件>")
         return
         
     input_file = sys.argv[1]
-    analyzer = LexicalAnalyzer()
+    # 导出时直接使用紧凑的单词序列，各格式按列生成
+    analyzer = LexicalAnalyzer(backend=backend, compact=output_format != 'text', profile=profile,
+                               recovery=recovery, max_errors=max_errors, max_error_rate=max_error_rate,
+                               collect_stats=collect_stats)
     
     # 加载文件
     if not analyzer.load_file(input_file):
         return
         
     # 执行词法分析
-    tokens = analyzer.analyze()
-    
-    # 打印结果
-    analyzer.print_results()
+    tokens = analyzer.analyze(jobs)
     
-    # 打印统计信息
-    print("\n分析统计:")
-    print(f"标识符表: {identifiers}")
-    print(f"常数表: {constants}")
-    print(f"错误数量: {analyzer.error_count}")
+    try:
+        write_results(analyzer, output_format, output_path, stats_only)
+    except BrokenPipeError:
+        # 标准输出的读取端已关闭（如通过管道交给head），剩余的输出和退出时的刷新都写到/dev/null，安静地退出
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+def write_results(analyzer, output_format='text', output_path=None, stats_only=False):
+    """输出分析结果：写到output_path，为None时写到标准输出"""
+    # 导出结果，不打印统计信息，便于其他程序读取标准输出
+    if output_format != 'text':
+        from token_export import BINARY_FORMATS, open_output
+        if output_path:
+            with open_output(output_path, output_format) as out:
+                analyzer.export_results(output_format, out)
+        elif output_format in BINARY_FORMATS:
+            analyzer.export_results(output_format, sys.stdout.buffer)
+        else:
+            analyzer.export_results(output_format, sys.stdout)
+        # 性能统计写到标准错误，不混入导出的单词序列
+        if analyzer.stats is not None:
+            analyzer.stats.write(sys.stderr, analyzer.get_type_name)
+        return
+
+    # 打印结果和统计信息，stats_only为True时只打印统计信息
+    out = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    try:
+        if not stats_only:
+            analyzer.print_results(out)
+        analyzer.print_statistics(out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
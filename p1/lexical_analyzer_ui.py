@@ -9,19 +9,31 @@
 import sys
 import os
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                           QHBoxLayout, QTextEdit, QPushButton, QTableWidget, 
-                           QTableWidgetItem, QFileDialog, QTabWidget, QLabel,
-                           QSplitter, QListWidget, QMessageBox)
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QFont, QIcon, QColor
+                           QHBoxLayout, QTextEdit, QPushButton, QTableView, 
+                           QFileDialog, QTabWidget, QLabel,
+                           QSplitter, QListView, QMessageBox, QCheckBox, QHeaderView,
+                           QProgressBar)
+from PyQt6.QtCore import Qt, QSize, QTimer, QThread
+from PyQt6.QtGui import QFont, QIcon
 
 # 导入词法分析器模块
-from lexical_analyzer import LexicalAnalyzer, TYPE_KEYWORD, TYPE_DELIMITER, TYPE_OPERATOR, TYPE_RELATIONAL, TYPE_CONSTANT, TYPE_IDENTIFIER
+from lexical_analyzer import LexicalAnalyzer, TokenStream, TYPE_KEYWORD, TYPE_DELIMITER, TYPE_OPERATOR, TYPE_RELATIONAL, TYPE_CONSTANT, TYPE_IDENTIFIER
+from analysis_worker import AnalysisWorker
+from incremental_lexer import IncrementalLexer
+from token_models import TokenTableModel, ErrorTableModel, SymbolListModel
+
+# 实时分析时停止输入多久之后开始分析（毫秒）
+LIVE_ANALYSIS_DELAY = 200
 
 class LexicalAnalyzerUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.analyzer = LexicalAnalyzer()
+        # 实时分析使用的增量分析器，未开启实时分析时为None
+        self.incremental = None
+        # 正在执行的后台分析线程和工作对象，空闲时为None
+        self.analysis_thread = None
+        self.worker = None
         self.init_ui()
         
     def init_ui(self):
@@ -49,8 +61,15 @@ class LexicalAnalyzerUI(QMainWindow):
         self.code_editor = QTextEdit()
         self.code_editor.setFont(QFont('Courier New', 12))
         self.code_editor.setPlaceholderText('在此处输入代码...')
+        self.code_editor.textChanged.connect(self.on_text_changed)
         top_layout.addWidget(self.code_editor)
         
+        # 实时分析的延时定时器，连续输入时只在停顿后分析一次
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_ANALYSIS_DELAY)
+        self.live_timer.timeout.connect(self.analyze_incremental)
+        
         # 按钮区域
         button_layout = QHBoxLayout()
         
@@ -62,10 +81,19 @@ class LexicalAnalyzerUI(QMainWindow):
         self.analyze_btn.clicked.connect(self.analyze_code)
         button_layout.addWidget(self.analyze_btn)
         
+        self.stop_btn = QPushButton('停止分析')
+        self.stop_btn.clicked.connect(self.stop_analysis)
+        self.stop_btn.setEnabled(False)
+        button_layout.addWidget(self.stop_btn)
+        
         self.clear_btn = QPushButton('清空')
         self.clear_btn.clicked.connect(self.clear_all)
         button_layout.addWidget(self.clear_btn)
         
+        self.live_checkbox = QCheckBox('实时分析')
+        self.live_checkbox.toggled.connect(self.toggle_live_analysis)
+        button_layout.addWidget(self.live_checkbox)
+        
         top_layout.addLayout(button_layout)
         
         # 创建下方结果显示区域
@@ -77,34 +105,68 @@ class LexicalAnalyzerUI(QMainWindow):
         self.tab_widget = QTabWidget()
         bottom_layout.addWidget(self.tab_widget)
         
-        # 词法单元表
-        self.token_table = QTableWidget()
-        self.token_table.setColumnCount(5)
-        self.token_table.setHorizontalHeaderLabels(['单词', '类型', '属性值', '行号', '列号'])
+        # 词法单元表，视图只为可见的行向模型请求数据
+        self.token_model = TokenTableModel(self.analyzer, self)
+        self.token_table = QTableView()
+        self.token_table.setModel(self.token_model)
         self.token_table.horizontalHeader().setStretchLastSection(True)
+        # 行高固定，视图不必逐行计算尺寸
+        self.token_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        # 双击单词跳转到源代码中的位置
+        self.token_table.doubleClicked.connect(
+            lambda index: self.jump_to_token(self.token_model.token_at(index.row())))
         self.tab_widget.addTab(self.token_table, '词法单元')
         
         # 标识符表
-        self.identifier_list = QListWidget()
+        self.identifier_model = SymbolListModel(self)
+        self.identifier_list = QListView()
+        self.identifier_list.setModel(self.identifier_model)
+        self.identifier_list.setUniformItemSizes(True)
         self.tab_widget.addTab(self.identifier_list, '标识符表')
         
         # 常数表
-        self.constant_list = QListWidget()
+        self.constant_model = SymbolListModel(self)
+        self.constant_list = QListView()
+        self.constant_list.setModel(self.constant_model)
+        self.constant_list.setUniformItemSizes(True)
         self.tab_widget.addTab(self.constant_list, '常数表')
         
         # 错误信息
-        self.error_table = QTableWidget()
-        self.error_table.setColumnCount(3)
-        self.error_table.setHorizontalHeaderLabels(['错误', '行号', '列号'])
+        self.error_model = ErrorTableModel(self)
+        self.error_table = QTableView()
+        self.error_table.setModel(self.error_model)
         self.error_table.horizontalHeader().setStretchLastSection(True)
+        self.error_table.doubleClicked.connect(
+            lambda index: self.jump_to_token(self.error_model.token_at(index.row())))
         self.tab_widget.addTab(self.error_table, '错误信息')
         
-        # 设置状态栏
+        # 设置状态栏，后台分析时显示按已分析字节数计算的进度
         self.status_bar = self.statusBar()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.status_bar.addPermanentWidget(self.progress_bar)
         
         # 设置窗口比例
         splitter.setSizes([400, 400])
     
+    def jump_to_token(self, token):
+        """
+        把编辑器的光标移到单词在源代码中的位置
+        文档按行分块，按行号查找块为对数时间，不必从头数换行符；
+        列号为0的错误位于上一行的换行符处
+        """
+        block = self.code_editor.document().findBlockByNumber(token['line'] - 1)
+        if not block.isValid():
+            return
+        position = max(block.position() + token['column'] - 1, 0)
+        cursor = self.code_editor.textCursor()
+        cursor.setPosition(min(position, self.code_editor.document().characterCount() - 1))
+        self.code_editor.setTextCursor(cursor)
+        self.code_editor.ensureCursorVisible()
+        self.code_editor.setFocus()
+    
     def load_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "打开文件", "", "所有文件 (*)")
         
@@ -117,6 +179,11 @@ class LexicalAnalyzerUI(QMainWindow):
                 QMessageBox.critical(self, "错误", f"无法打开文件: {e}")
     
     def analyze_code(self):
+        # 实时分析模式下只需增量更新
+        if self.incremental is not None:
+            self.analyze_incremental()
+            return
+            
         # 获取代码内容
         code = self.code_editor.toPlainText()
         
@@ -124,84 +191,131 @@ class LexicalAnalyzerUI(QMainWindow):
             QMessageBox.warning(self, "警告", "请先输入或加载代码")
             return
         
-        # 执行词法分析
-        self.analyzer.load_string(code)
-        tokens = self.analyzer.analyze()
-        
-        # 清空之前的结果
-        self.token_table.setRowCount(0)
-        self.identifier_list.clear()
-        self.constant_list.clear()
-        self.error_table.setRowCount(0)
-        
-        # 更新词法单元表
-        self.token_table.setRowCount(len(tokens))
-        error_count = 0
-        
-        for i, token in enumerate(tokens):
-            # 单词
-            self.token_table.setItem(i, 0, QTableWidgetItem(token['value']))
-            
-            if token['type'] == 'Error':
-                # 错误处理
-                self.token_table.setItem(i, 1, QTableWidgetItem('错误'))
-                self.token_table.setItem(i, 2, QTableWidgetItem('N/A'))
-                
-                # 添加到错误表
-                self.error_table.insertRow(error_count)
-                self.error_table.setItem(error_count, 0, QTableWidgetItem(token['error_msg']))
-                self.error_table.setItem(error_count, 1, QTableWidgetItem(str(token['line'])))
-                self.error_table.setItem(error_count, 2, QTableWidgetItem(str(token['column'])))
-                error_count += 1
-                
-                # 设置错误行的颜色
-                for col in range(5):
-                    if self.token_table.item(i, col):
-                        self.token_table.item(i, col).setBackground(QColor(255, 200, 200))
-            else:
-                # 正常token处理
-                type_name = self.analyzer.get_type_name(token['type'])
-                attribute = self.analyzer.get_token_attribute(token)
-                
-                self.token_table.setItem(i, 1, QTableWidgetItem(type_name))
-                self.token_table.setItem(i, 2, QTableWidgetItem(str(attribute)))
-            
-            # 位置信息
-            self.token_table.setItem(i, 3, QTableWidgetItem(str(token['line'])))
-            self.token_table.setItem(i, 4, QTableWidgetItem(str(token['column'])))
-        
-        # 更新标识符表
-        from lexical_analyzer import identifiers
-        for identifier in identifiers:
-            self.identifier_list.addItem(identifier)
-        
-        # 更新常数表
-        from lexical_analyzer import constants
-        for constant in constants:
-            self.constant_list.addItem(constant)
+        # 在后台线程中执行词法分析，单词按批追加到紧凑的TokenStream中，由模型按需取出显示
+        self.token_model.set_tokens(TokenStream())
+        self.error_model.set_errors(self.token_model.tokens, [])
+        self.identifier_model.set_symbols([])
+        self.constant_model.set_symbols([])
+        
+        self.analysis_thread = QThread(self)
+        self.worker = AnalysisWorker(code)
+        self.worker.moveToThread(self.analysis_thread)
+        self.analysis_thread.started.connect(self.worker.run)
+        self.worker.batch_ready.connect(self.on_batch_ready)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.finished.connect(self.on_analysis_finished)
+        self.worker.finished.connect(self.analysis_thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.analysis_thread.finished.connect(self.analysis_thread.deleteLater)
+        
+        self.set_running(True)
+        self.status_bar.showMessage('正在分析...')
+        self.analysis_thread.start()
+    
+    def set_running(self, running):
+        """后台分析期间禁止开始新的分析"""
+        self.analyze_btn.setEnabled(not running)
+        self.live_checkbox.setEnabled(not running)
+        self.clear_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(running)
+    
+    def stop_analysis(self):
+        if self.worker is not None:
+            self.worker.cancel()
+    
+    def on_batch_ready(self, batch):
+        """追加一批单词及其中的错误"""
+        base = len(self.token_model.tokens)
+        self.token_model.append_stream(batch)
+        self.error_model.append_errors([base + index for index in batch.error_indexes()])
+    
+    def on_progress(self, done, total):
+        self.progress_bar.setValue(done * 1000 // total if total else 1000)
+    
+    def on_analysis_finished(self, analyzer, cancelled):
+        self.analyzer = analyzer
+        self.worker = None
+        self.analysis_thread = None
+        self.set_running(False)
+        
+        tokens = self.token_model.tokens
+        identifiers = analyzer.identifiers
+        constants = analyzer.constants
+        self.identifier_model.set_symbols(identifiers)
+        self.constant_model.set_symbols(constants)
+        error_count = len(self.error_model.indexes)
         
         # 更新状态栏
+        if cancelled:
+            self.status_bar.showMessage(f'分析已取消: 已分析{len(tokens)}个词法单元')
+            return
         self.status_bar.showMessage(f'分析完成: {len(tokens)}个词法单元, {len(identifiers)}个标识符, {len(constants)}个常数, {error_count}个错误')
         
         # 自动切换到错误标签页(如果有错误)
         if error_count > 0:
             self.tab_widget.setCurrentIndex(3)
     
+    def closeEvent(self, event):
+        # 关闭窗口前停止后台分析
+        if self.worker is not None:
+            self.worker.cancel()
+            self.analysis_thread.quit()
+            self.analysis_thread.wait()
+        super().closeEvent(event)
+    
+    def toggle_live_analysis(self, checked):
+        """开启或关闭实时分析"""
+        self.live_timer.stop()
+        # 各表格中是切换之前的分析结果，开启和关闭时都一并清空
+        self.token_model.set_tokens([])
+        self.error_model.set_errors([])
+        self.identifier_model.set_symbols([])
+        self.constant_model.set_symbols([])
+        if checked:
+            # 增量分析器从空白状态开始，第一次分析产生全部单词
+            self.incremental = IncrementalLexer()
+            self.analyze_incremental()
+        else:
+            self.incremental = None
+            self.status_bar.showMessage('实时分析已关闭')
+    
+    def on_text_changed(self):
+        if self.incremental is not None:
+            self.live_timer.start()
+    
+    def analyze_incremental(self):
+        """增量分析：只重新扫描修改过的行，并只更新发生变化的表格行"""
+        patch = self.incremental.update(self.code_editor.toPlainText())
+        if not patch.is_empty():
+            self.token_model.apply_patch(patch)
+        
+        if patch.errors_changed:
+            self.error_model.set_errors(list(self.incremental.errors()))
+        if patch.symbols_changed:
+            self.identifier_model.set_symbols(self.incremental.identifiers)
+            self.constant_model.set_symbols(self.incremental.constants)
+        
+        self.status_bar.showMessage(f'实时分析: {self.incremental.token_count}个词法单元, '
+                                    f'{len(self.incremental.identifiers)}个标识符, '
+                                    f'{len(self.incremental.constants)}个常数, '
+                                    f'{self.incremental.error_count}个错误')
+    
     def clear_all(self):
         # 清空代码编辑器
         self.code_editor.clear()
         
-        # 清空结果
-        self.token_table.setRowCount(0)
-        self.identifier_list.clear()
-        self.constant_list.clear()
-        self.error_table.setRowCount(0)
-        
         # 重置词法分析器状态
-        from lexical_analyzer import identifiers, constants
-        identifiers.clear()
-        constants.clear()
         self.analyzer = LexicalAnalyzer()
+        if self.incremental is not None:
+            self.incremental = IncrementalLexer()
+        
+        # 清空结果
+        self.token_model.set_tokens([], self.analyzer)
+        self.identifier_model.set_symbols([])
+        self.constant_model.set_symbols([])
+        self.error_model.set_errors([])
         
         # 更新状态栏
         self.status_bar.showMessage('已清空')
@@ -9,11 +9,10 @@
 import sys
 import os
 import argparse
-from PyQt6.QtWidgets import QApplication
 
-# 导入词法分析器模块
-from lexical_analyzer import LexicalAnalyzer, main as analyzer_cli
-from lexical_analyzer_ui import LexicalAnalyzerUI
+# 导入词法分析器模块；图形界面只在使用时才导入PyQt6，命令行模式不必等待其载入
+from lexical_analyzer import LexicalAnalyzer, BACKENDS, MAX_ERRORS, MAX_ERROR_RATE, load_profile, main as analyzer_cli
+from token_export import EXPORT_FORMATS
 
 def main():
     # 创建命令行参数解析器
@@ -21,17 +20,52 @@ def main():
     parser.add_argument('-f', '--file', help='要分析的源代码文件')
     parser.add_argument('-c', '--cli', action='store_true', help='使用命令行界面')
     parser.add_argument('-g', '--gui', action='store_true', help='使用图形用户界面')
+    parser.add_argument('--batch', metavar='DIR', help='批量分析目录下的所有源文件')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行分析使用的进程数，批量模式默认为CPU核数，单个文件默认不并行')
+    parser.add_argument('-b', '--backend', choices=BACKENDS, default='default', help='扫描引擎')
+    parser.add_argument('--no-cache', action='store_true', help='批量模式不使用单词序列缓存')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='text',
+                        help='命令行模式的输出格式: text定宽文本, jsonl每行一个JSON对象, csv, columnar列式二进制')
+    parser.add_argument('-o', '--output', help='命令行模式的结果写入的文件，默认为标准输出')
+    parser.add_argument('-p', '--profile', metavar='FILE', help='语言配置文件（JSON或TOML），默认为内置的C子集')
+    parser.add_argument('-s', '--stats-only', action='store_true', help='命令行模式只打印统计信息，不逐个打印单词')
+    parser.add_argument('-r', '--recover', action='store_true',
+                        help='命令行模式使用恢复模式：连续的未识别字符合并为一个错误，限制错误数和错误率')
+    parser.add_argument('--max-errors', type=int, default=MAX_ERRORS, metavar='N',
+                        help=f'恢复模式最多记录的错误数，默认为{MAX_ERRORS}')
+    parser.add_argument('--max-error-rate', type=float, default=MAX_ERROR_RATE, metavar='R',
+                        help=f'恢复模式允许的错误率，超过时停止分析，默认为{MAX_ERROR_RATE}')
+    parser.add_argument('--perf-stats', action='store_true',
+                        help='命令行模式打印性能统计：各类单词的数量和耗时、各处理函数的耗时和消耗的字符数、符号表命中率')
     
     args = parser.parse_args()
     
+    # 载入语言配置
+    profile = None
+    if args.profile:
+        try:
+            profile = load_profile(args.profile)
+        except (OSError, ValueError) as e:
+            print(f"无法载入语言配置: {e}")
+            sys.exit(1)
+    
+    # 批量模式
+    if args.batch:
+        from parallel_lexer import run_batch
+        run_batch(args.batch, args.jobs, args.backend, not args.no_cache, profile)
+        return
+    
     # 如果指定了--cli参数或者指定了输入文件但没有指定界面类型，则使用命令行界面
     if args.cli or (args.file and not args.gui):
         # 如果提供了文件参数，将其传递给命令行工具
         if args.file:
             sys.argv = [sys.argv[0], args.file]
-        analyzer_cli()
+        analyzer_cli(args.backend, args.jobs or 1, args.format, args.output, args.stats_only, profile,
+                     args.recover, args.max_errors, args.max_error_rate, args.perf_stats)
     else:
         # 默认使用图形界面
+        from PyQt6.QtWidgets import QApplication
+        from lexical_analyzer_ui import LexicalAnalyzerUI
         app = QApplication(sys.argv)
         window = LexicalAnalyzerUI()
         
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运算符字典树
+由运算符表构造字典树，按最长匹配识别任意长度的运算符：
+沿字典树只向前读一遍并记住最后一个完整的运算符，不回退重读，
+手写扫描器、表驱动扫描器和语言配置共用同一棵树
+"""
+
+# 字典树节点中标记完整运算符的键，空字符串不会是任何字符
+TRIE_ACCEPT = ''
+
+
+class OperatorTrie:
+    """
+    运算符字典树
+
+    table为 运算符 -> 识别结果 的字典（语言配置中为 (类型, 单词的值, 错误信息)）；
+    root的每个节点是 字符 -> 子节点 的字典，完整运算符的节点中TRIE_ACCEPT键的值为该运算符
+    """
+    def __init__(self, table):
+        self.table = dict(table)
+        self.root = {}
+        for lexeme in self.table:
+            node = self.root
+            for char in lexeme:
+                node = node.setdefault(char, {})
+            node[TRIE_ACCEPT] = lexeme
+        # 最长运算符的长度，即识别一个运算符最多需要查看的字符数
+        self.max_length = max((len(lexeme) for lexeme in self.table), default=0)
+        # 不是任何更长运算符前缀的单字符运算符，识别时不必查看下一个字符
+        self.single = {char: self.table[char] for char, node in self.root.items()
+                       if len(node) == 1 and TRIE_ACCEPT in node}
+        self.lookahead = self.node_lookahead(self.root)
+
+    def node_lookahead(self, node, since_accept=0):
+        """
+        最长匹配时在最后一个完整运算符之后最多还要多读入的字符数
+        运算符表的每个前缀都是运算符时为0；分块扫描时延伸到块末尾这么多字符以内的单词需等待下一块
+        """
+        if TRIE_ACCEPT in node:
+            since_accept = 0
+        deepest = since_accept
+        for char, child in node.items():
+            if char != TRIE_ACCEPT:
+                deepest = max(deepest, self.node_lookahead(child, since_accept + 1))
+        return deepest
+
+    def match(self, text, start=0):
+        """
+        从start开始按最长匹配查找运算符
+        返回匹配到的运算符，start处不是任何运算符时返回None
+        """
+        node = self.root
+        matched = None
+        for index in range(start, min(len(text), start + self.max_length)):
+            node = node.get(text[index])
+            if node is None:
+                break
+            if TRIE_ACCEPT in node:
+                matched = node[TRIE_ACCEPT]
+        return matched
+
+    def __contains__(self, char):
+        """char是否为某个运算符的首字符"""
+        return char in self.root
+
+    def __len__(self):
+        return len(self.table)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+并行词法分析
+把多个源文件分配到进程池中分别分析，最后按文件顺序合并统计结果；
+单个大文件可以在字符串之外的换行处切分为多段，各段并行分析后按顺序拼接
+"""
+
+import os
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from lexical_analyzer import LexicalAnalyzer, SymbolTable, TokenStream, TYPE_ERROR_CODE, TYPE_KEYWORD, TYPE_DELIMITER, TYPE_OPERATOR, TYPE_RELATIONAL, TYPE_CONSTANT, TYPE_IDENTIFIER
+
+# 批量模式默认分析的源文件扩展名
+SOURCE_EXTENSIONS = ('.c',)
+
+# 文件内并行时每段的最小字符数，再小的文件进程间传输的开销会超过并行的收益
+MIN_SEGMENT_SIZE = 256 * 1024
+
+
+def collect_source_files(directory, extensions=SOURCE_EXTENSIONS):
+    """递归收集目录下的源文件，按路径排序以保证合并顺序稳定"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith(extensions):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def lex_file(path, backend='default', use_cache=False, profile=None):
+    """
+    分析单个文件，在工作进程中执行
+
+    每个文件使用独立的分析器和符号表，只返回可序列化的统计结果，
+    不把整个单词序列传回主进程；use_cache为True时分析结果从单词序列缓存中读取
+    """
+    if use_cache:
+        from token_cache import shared_cache, analyze_file
+        analyzer = analyze_file(path, shared_cache(), backend, profile)
+        if analyzer is None:
+            return {'path': path, 'ok': False}
+        tokens = analyzer.tokens
+        # 直接按种别码列统计，不逐个构造Token
+        type_counts = Counter(tokens.types)
+        if TYPE_ERROR_CODE in type_counts:
+            type_counts['Error'] = type_counts.pop(TYPE_ERROR_CODE)
+        errors = []
+        for index in tokens.error_indexes():
+            token = tokens[index]
+            errors.append((token['error_msg'], token['line'], token['column']))
+    else:
+        analyzer = LexicalAnalyzer(backend=backend, profile=profile)
+        if not analyzer.load_file(path):
+            return {'path': path, 'ok': False}
+
+        type_counts = Counter()
+        errors = []
+        for token in analyzer.iter_tokens():
+            type_counts[token['type']] += 1
+            if token['type'] == 'Error':
+                errors.append((token['error_msg'], token['line'], token['column']))
+
+    return {
+        'path': path,
+        'ok': True,
+        'token_count': sum(type_counts.values()),
+        'type_counts': dict(type_counts),
+        'errors': errors,
+        'identifiers': list(analyzer.identifiers),
+        'constants': list(analyzer.constants),
+    }
+
+
+class BatchResult:
+    """批量分析的合并结果"""
+    def __init__(self):
+        self.files = []
+        self.failed = []
+        self.type_counts = Counter()
+        self.errors = []
+        # 合并后的符号表，按文件顺序和文件内首次出现的顺序登记
+        self.identifiers = SymbolTable()
+        self.constants = SymbolTable()
+
+    def merge(self, result):
+        """合并一个文件的分析结果，必须按文件顺序调用"""
+        if not result['ok']:
+            self.failed.append(result['path'])
+            return
+        self.files.append(result)
+        self.type_counts.update(result['type_counts'])
+        for error_msg, line, column in result['errors']:
+            self.errors.append((result['path'], line, column, error_msg))
+        for identifier in result['identifiers']:
+            self.identifiers.intern(identifier)
+        for constant in result['constants']:
+            self.constants.intern(constant)
+
+    @property
+    def token_count(self):
+        return sum(self.type_counts.values())
+
+    def print_summary(self):
+        """打印合并后的统计信息"""
+        print(f"{'文件':<40}{'单词数':<10}{'错误数':<10}")
+        print("-" * 60)
+        for result in self.files:
+            print(f"{result['path']:<40}{result['token_count']:<10}{len(result['errors']):<10}")
+        for path in self.failed:
+            print(f"{path:<40}{'无法读取':<10}")
+
+        print("\n分析统计:")
+        print(f"文件数量: {len(self.files)}")
+        print(f"单词总数: {self.token_count}")
+        for type_code in (TYPE_KEYWORD, TYPE_DELIMITER, TYPE_OPERATOR, TYPE_RELATIONAL, TYPE_CONSTANT, TYPE_IDENTIFIER):
+            print(f"{LexicalAnalyzer.get_type_name(type_code)}: {self.type_counts.get(type_code, 0)}")
+        print(f"标识符表: {len(self.identifiers)}个不同的标识符")
+        print(f"常数表: {len(self.constants)}个不同的常数")
+        print(f"错误数量: {len(self.errors)}")
+
+        if self.errors:
+            print("\n错误列表:")
+            for path, line, column, error_msg in self.errors:
+                print(f"{path}:({line}, {column}) {error_msg}")
+
+
+def analyze_files(paths, jobs=None, backend='default', use_cache=False, profile=None):
+    """
+    并行分析多个文件并合并结果
+
+    jobs为进程数，默认为CPU核数；jobs为1时在当前进程中依次分析。
+    use_cache为True时各工作进程只按自己写入的大小淘汰缓存，全部完成后再按缓存目录的实际大小淘汰一次
+    """
+    batch = BatchResult()
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) <= 1:
+        for path in paths:
+            batch.merge(lex_file(path, backend, use_cache, profile))
+    else:
+        # 每个任务包含若干文件，减少进程间通信的次数
+        chunksize = max(1, len(paths) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # map按提交顺序返回结果，合并顺序与串行分析一致
+            count = len(paths)
+            for result in executor.map(lex_file, paths, [backend] * count, [use_cache] * count,
+                                       [profile] * count, chunksize=chunksize):
+                batch.merge(result)
+    if use_cache:
+        from token_cache import shared_cache
+        shared_cache().evict()
+    return batch
+
+
+def run_batch(directory, jobs=None, backend='default', use_cache=True, profile=None):
+    """批量分析目录下的所有源文件并打印合并结果，默认使用单词序列缓存"""
+    paths = collect_source_files(directory)
+    if not paths:
+        print(f"目录中没有源文件: {directory}")
+        return None
+
+    print(f"批量分析: {len(paths)}个文件，{jobs or os.cpu_count()}个进程")
+    print("=" * 60)
+    batch = analyze_files(paths, jobs, backend, use_cache, profile)
+    batch.print_summary()
+    return batch
+
+
+def find_split_points(content, parts):
+    """
+    找出把源代码切分为至多parts段的位置
+
+    单词不会跨越字符串之外的换行，因此只在这样的换行之后切分：
+    先扫描一遍所有双引号的位置，某个换行之前的双引号个数为偶数时它就不在字符串中。
+    返回各段的起始偏移，第一个总是0
+    """
+    quotes = []
+    position = content.find('"')
+    while position != -1:
+        quotes.append(position)
+        position = content.find('"', position + 1)
+
+    n = len(content)
+    starts = [0]
+    for k in range(1, parts):
+        position = max(n * k // parts, starts[-1])
+        while True:
+            newline = content.find('\n', position)
+            if newline == -1:
+                return starts
+            count = bisect_left(quotes, newline)
+            if count % 2 == 0:
+                break
+            if count == len(quotes):
+                # 未闭合的字符串一直延续到文件末尾，之后没有可以切分的位置
+                return starts
+            # 换行在字符串中，从字符串结束的双引号之后继续查找
+            position = quotes[count] + 1
+        if newline + 1 < n and newline + 1 > starts[-1]:
+            starts.append(newline + 1)
+    return starts
+
+
+def lex_segment(text, backend='default', compact=True, profile=None):
+    """
+    分析一段源代码，在工作进程中执行
+
+    返回该段的单词序列、局部符号表和错误数；行号从该段的第1行开始，
+    常数和标识符的属性值是局部符号表中的下标，由主进程换算
+    """
+    analyzer = LexicalAnalyzer(backend=backend, compact=compact, profile=profile)
+    analyzer.load_string(text)
+    analyzer.analyze()
+    return analyzer.tokens, list(analyzer.identifiers), list(analyzer.constants), analyzer.error_count
+
+
+def analyze_parallel(analyzer, jobs):
+    """
+    把分析器中已加载的源代码切分后并行分析，结果拼接到analyzer.tokens中
+
+    各段按顺序合并：行号加上该段之前的换行数，局部符号表按顺序登记到分析器的符号表中，
+    登记顺序与顺序分析时首次出现的顺序相同，因此换算后的属性值与顺序分析完全一致
+    """
+    content = analyzer.content
+    parts = min(jobs, len(content) // MIN_SEGMENT_SIZE)
+    starts = find_split_points(content, parts) if parts > 1 else [0]
+    if len(starts) == 1:
+        return analyzer.analyze()
+
+    segments = [content[start:end] for start, end in zip(starts, starts[1:] + [len(content)])]
+    compact = isinstance(analyzer.tokens, TokenStream)
+    count = len(segments)
+    with ProcessPoolExecutor(max_workers=min(jobs, count)) as executor:
+        results = executor.map(lex_segment, segments, [analyzer.backend] * count, [compact] * count,
+                               [analyzer.profile] * count)
+
+        line_offset = 0
+        for segment, (tokens, identifiers, constants, error_count) in zip(segments, results):
+            identifier_map = [analyzer.identifiers.intern(symbol) for symbol in identifiers]
+            constant_map = [analyzer.constants.intern(symbol) for symbol in constants]
+            if compact:
+                analyzer.tokens.extend_stream(tokens, line_offset, identifier_map, constant_map)
+            else:
+                for token in tokens:
+                    token.line += line_offset
+                    if token.type == TYPE_IDENTIFIER:
+                        token.attribute = identifier_map[token.attribute]
+                    elif token.type == TYPE_CONSTANT:
+                        token.attribute = constant_map[token.attribute]
+                    analyzer.tokens.append(token)
+            analyzer.error_count += error_count
+            line_offset += segment.count('\n')
+
+    # 整个缓冲区已经分析完毕
+    analyzer.position = len(content)
+    return analyzer.tokens
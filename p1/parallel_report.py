@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多文件并行生成PDF报告
+每个文件的分析和排版在工作进程中进行，分别输出为独立的PDF片段，
+主进程按片段的页数生成带目录的封面，再把封面和各片段按顺序拼接为一个PDF文件
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.platypus import Paragraph
+
+from lexical_analyzer import LexicalAnalyzer
+from parallel_lexer import collect_source_files
+from pdf_document import PdfReportGenerator
+from report_generator import generate_token_report, REPORT_MODES
+from token_cache import shared_cache, analyze_file
+
+# 拼接PDF需要pypdf，没有安装时退回到在一个文档中依次排版
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+# 报告中的作者信息
+REPORT_AUTHOR = "李健豪 222241807417 计科2班"
+
+
+def file_section(path):
+    """源文件对应的报告章节"""
+    return {'file_path': path}
+
+
+def code_section(description, code):
+    """一段源代码对应的报告章节"""
+    return {'description': description, 'code': code}
+
+
+def section_title(section):
+    """章节标题，与generate_token_report中的一级标题相同"""
+    if section.get('file_path'):
+        return f"文件分析: {os.path.basename(section['file_path'])}"
+    return f"代码分析: {section['description']}"
+
+
+def load_section(section, use_cache=True):
+    """分析章节的源代码，无法读取文件时返回None"""
+    if section.get('file_path'):
+        return analyze_file(section['file_path'], shared_cache() if use_cache else None)
+    analyzer = LexicalAnalyzer(compact=True)
+    analyzer.load_string(section['code'])
+    analyzer.analyze()
+    return analyzer
+
+
+def add_section(report_generator, section, mode='full', use_cache=True):
+    """把一个章节的分析结果添加到报告中"""
+    analyzer = load_section(section, use_cache)
+    if analyzer is None:
+        report_generator.add_heading(section_title(section), 1)
+        report_generator.add_paragraph("无法读取源文件")
+        return
+    generate_token_report(analyzer, section.get('file_path'), section.get('description'),
+                          report_generator, mode)
+
+
+def render_section(section, fragment_path, mode='full', use_cache=True):
+    """
+    分析一个章节并输出为单独的PDF片段，在工作进程中执行
+    返回片段的页数，生成失败时返回0
+    """
+    report_generator = PdfReportGenerator(fragment_path)
+    add_section(report_generator, section, mode, use_cache)
+    if not report_generator.build(verbose=False):
+        return 0
+    return report_generator.doc.page
+
+
+def add_cover(report_generator, title, titles, pages=None):
+    """添加标题、生成时间和目录，pages为各章节的起始页码，为None时只列出章节标题"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    report_generator.add_title(title)
+    report_generator.add_paragraph(REPORT_AUTHOR)
+    report_generator.add_paragraph(f"生成时间: {now}")
+    report_generator.add_heading("目录", 2)
+    style = report_generator.styles['ChineseNormal']
+    rows = [["章节", "页码"]]
+    for index, section_name in enumerate(titles):
+        rows.append([Paragraph(section_name, style), str(pages[index]) if pages else ""])
+    report_generator.add_table(rows, colWidths=[340, 80])
+
+
+def build_cover(cover_path, title, titles, fragment_pages):
+    """
+    生成封面和目录，返回封面的页数
+    各章节的页码取决于封面的页数，封面页数与假设的不同时按实际页数重新生成
+    """
+    cover_pages = 1
+    while True:
+        pages = []
+        page = cover_pages + 1
+        for count in fragment_pages:
+            pages.append(page)
+            page += count
+        report_generator = PdfReportGenerator(cover_path)
+        add_cover(report_generator, title, titles, pages)
+        if not report_generator.build(verbose=False):
+            return 0
+        if report_generator.doc.page == cover_pages:
+            return cover_pages
+        cover_pages = report_generator.doc.page
+
+
+def merge_fragments(output_path, cover_path, fragments):
+    """按顺序拼接封面和各片段，并为每个章节添加书签；fragments为 (章节标题, 片段路径) 列表"""
+    writer = PdfWriter()
+    writer.append(cover_path)
+    for title, fragment_path in fragments:
+        page_index = len(writer.pages)
+        writer.append(fragment_path)
+        writer.add_outline_item(title, page_index)
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+
+
+def generate_serial_report(sections, output_path, title="词法分析综合报告", mode='full', use_cache=True):
+    """在一个文档中依次排版全部章节，目录中不含页码"""
+    report_generator = PdfReportGenerator(output_path)
+    add_cover(report_generator, title, [section_title(section) for section in sections])
+    for section in sections:
+        report_generator.add_page_break()
+        add_section(report_generator, section, mode, use_cache)
+    report_generator.build()
+    return output_path
+
+
+def generate_parallel_report(sections, output_path, title="词法分析综合报告", jobs=None, mode='full',
+                             use_cache=True):
+    """
+    并行生成多个章节的综合报告
+
+    jobs为进程数，默认为CPU核数；jobs为1时在当前进程中依次生成各片段。
+    没有安装pypdf时无法拼接片段，改为调用generate_serial_report
+    """
+    if PdfWriter is None:
+        print("警告: 未安装pypdf，无法拼接PDF片段，改为依次生成报告")
+        return generate_serial_report(sections, output_path, title, mode, use_cache)
+
+    jobs = jobs or os.cpu_count() or 1
+    titles = [section_title(section) for section in sections]
+    with tempfile.TemporaryDirectory(prefix='p1_report_') as directory:
+        fragment_paths = [os.path.join(directory, f"section_{index}.pdf") for index in range(len(sections))]
+        count = len(sections)
+        if jobs == 1 or count <= 1:
+            fragment_pages = [render_section(section, path, mode, use_cache)
+                              for section, path in zip(sections, fragment_paths)]
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, count)) as executor:
+                # 各文件的排版时间差别很大，每个任务只含一个章节
+                fragment_pages = list(executor.map(render_section, sections, fragment_paths,
+                                                   [mode] * count, [use_cache] * count))
+
+        # 生成失败的片段不拼接
+        fragments = []
+        pages = []
+        for section_name, path, page_count in zip(titles, fragment_paths, fragment_pages):
+            if page_count:
+                fragments.append((section_name, path))
+                pages.append(page_count)
+            else:
+                print(f"生成章节时出错: {section_name}")
+
+        cover_path = os.path.join(directory, "cover.pdf")
+        if not build_cover(cover_path, title, [section_name for section_name, path in fragments], pages):
+            print("生成目录时出错")
+            return None
+        merge_fragments(output_path, cover_path, fragments)
+
+    print(f"PDF报告已生成: {output_path}")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多文件并行生成PDF报告')
+    parser.add_argument('inputs', nargs='+', help='源程序文件或目录，目录中的源文件按路径排序')
+    parser.add_argument('-o', '--output', default='词法分析综合报告.pdf', help='输出PDF文件')
+    parser.add_argument('-j', '--jobs', type=int, help='并行的进程数，默认为CPU核数')
+    parser.add_argument('--mode', choices=REPORT_MODES, default='full', help='报告内容，见report_generator.py')
+    parser.add_argument('--no-cache', action='store_true', help='不使用单词序列缓存')
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(collect_source_files(path) if os.path.isdir(path) else [path])
+    if not paths:
+        print("没有要分析的源文件")
+        sys.exit(1)
+
+    sections = [file_section(path) for path in paths]
+    generate_parallel_report(sections, args.output, jobs=args.jobs, mode=args.mode, use_cache=not args.no_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PDF报告的排版
+中文字体和共享样式表、按需构造的排版元素、分段绘制的网格表格和报告文档；
+所有ReportLab的导入都集中在这里，由report_generator.py在生成报告时才导入，
+只使用分析结果统计函数的程序不必载入ReportLab
+"""
+
+import os
+from functools import partial
+from itertools import islice
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Flowable, XPreformatted
+from reportlab.pdfbase import pdfmetrics
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+
+# 中文字体的候选路径，依次尝试，找到的路径保存在FONT_CACHE_FILE中，之后直接使用；
+# 环境变量P1_FONT_PATH可以指定其他字体文件（多个路径以os.pathsep分隔），优先于缓存和这些路径
+FONT_SEARCH_PATHS = [
+    # macOS
+    '/System/Library/Fonts/PingFang.ttc',
+    '/Library/Fonts/Arial Unicode.ttf',
+    '/System/Library/Fonts/STHeiti Light.ttc',
+    # Linux
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/usr/share/fonts/wqy-microhei/wqy-microhei.ttc',
+    '/usr/share/fonts/wqy-zenhei/wqy-zenhei.ttc',
+    '/usr/share/fonts/truetype/arphic/uming.ttc',
+    '/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf',
+    '/usr/share/fonts/google-droid/DroidSansFallbackFull.ttf',
+    # Windows
+    'C:/Windows/Fonts/simsun.ttc',
+    'C:/Windows/Fonts/msyh.ttf',
+]
+FONT_CACHE_FILE = os.environ.get('P1_FONT_CACHE') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'p1_lexer', 'font_path')
+CHINESE_FONT_NAME = 'SimSun'
+FALLBACK_FONT = 'Helvetica'
+
+# 已注册的中文字体名和各报告共享的样式表，第一次生成报告时才确定，导入模块时不读取任何字体
+chinese_font = None
+shared_styles = None
+
+def read_font_cache():
+    try:
+        with open(FONT_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+def write_font_cache(path):
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE_FILE), exist_ok=True)
+        with open(FONT_CACHE_FILE, 'w', encoding='utf-8') as f:
+            f.write(path)
+    except OSError:
+        pass
+
+def register_font(path):
+    """注册字体文件，文件不存在或格式不受支持时返回False"""
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        from reportlab.pdfbase.ttfonts import TTFont
+        pdfmetrics.registerFont(TTFont(CHINESE_FONT_NAME, path))
+        return True
+    except Exception:
+        return False
+
+def get_chinese_font():
+    """
+    返回用于中文的字体名，第一次调用时查找并注册字体
+    查找顺序为P1_FONT_PATH、上次找到的路径、FONT_SEARCH_PATHS；都不可用时使用默认字体
+    """
+    global chinese_font
+    if chinese_font is not None:
+        return chinese_font
+        
+    configured = [path for path in os.environ.get('P1_FONT_PATH', '').split(os.pathsep) if path]
+    for path in configured:
+        if register_font(path):
+            chinese_font = CHINESE_FONT_NAME
+            return chinese_font
+            
+    cached = read_font_cache()
+    if register_font(cached):
+        chinese_font = CHINESE_FONT_NAME
+        return chinese_font
+        
+    for path in FONT_SEARCH_PATHS:
+        if path != cached and register_font(path):
+            write_font_cache(path)
+            chinese_font = CHINESE_FONT_NAME
+            return chinese_font
+            
+    # 如果找不到中文字体，使用默认字体
+    chinese_font = FALLBACK_FONT
+    print("警告: 未找到中文字体，PDF中的中文可能无法正确显示")
+    return chinese_font
+
+def get_styles():
+    """返回各报告共享的样式表，第一次调用时创建"""
+    global shared_styles
+    if shared_styles is not None:
+        return shared_styles
+        
+    font = get_chinese_font()
+    styles = getSampleStyleSheet()
+    # 添加自定义样式
+    styles.add(ParagraphStyle(
+        name='ChineseTitle',
+        parent=styles['Title'],
+        fontName=font,
+        fontSize=20,
+        alignment=TA_CENTER,
+        spaceAfter=12
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ChineseHeading1',
+        parent=styles['Heading1'],
+        fontName=font,
+        fontSize=16,
+        alignment=TA_LEFT,
+        spaceAfter=8
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ChineseHeading2',
+        parent=styles['Heading2'],
+        fontName=font,
+        fontSize=14,
+        alignment=TA_LEFT,
+        spaceAfter=6
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ChineseNormal',
+        parent=styles['Normal'],
+        fontName=font,
+        fontSize=12,
+        alignment=TA_LEFT,
+        spaceAfter=6
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ChineseCode',
+        parent=styles['Code'],
+        fontName='Courier',
+        fontSize=10,
+        alignment=TA_LEFT,
+        spaceAfter=6
+    ))
+    shared_styles = styles
+    return shared_styles
+
+# 分段表格的行高，固定行高使每一段正好占满一页
+TABLE_HEADER_HEIGHT = 30
+TABLE_ROW_HEIGHT = 18
+
+# 源代码每段的行数
+CODE_CHUNK_LINES = 60
+
+
+class LazyFlowable(Flowable):
+    """
+    按需构造的排版元素
+    
+    排版到这个位置时才调用make_flowable构造实际的元素（如从单词迭代器中取出一页的行构造表格），
+    绘制后立即释放，文档中同时只保留正在排版的一部分内容
+    """
+    def __init__(self, make_flowable):
+        Flowable.__init__(self)
+        self.make_flowable = make_flowable
+        self.flowable = None
+        
+    def get_flowable(self):
+        if self.flowable is None:
+            self.flowable = self.make_flowable()
+        return self.flowable
+        
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = self.get_flowable().wrap(availWidth, availHeight)
+        return self.width, self.height
+        
+    def split(self, availWidth, availHeight):
+        # 当前页放不下时由实际元素自行拆分，拆分出的部分直接代替本元素
+        return self.get_flowable().split(availWidth, availHeight)
+        
+    def drawOn(self, canvas, x, y, _sW=0):
+        self.get_flowable().drawOn(canvas, x, y, _sW)
+        self.flowable = None
+
+class GridTable(Flowable):
+    """
+    行高固定、单元格只有一行文本的网格表格，用于分段输出大表格
+    
+    直接在画布上绘制整张网格和各单元格的文本，省去Table逐个单元格计算尺寸和应用样式的开销
+    """
+    def __init__(self, header, rows, colWidths, fontName, fontSize=10, headerFontSize=12,
+                 rowHeight=TABLE_ROW_HEIGHT, headerHeight=TABLE_HEADER_HEIGHT, padding=6):
+        Flowable.__init__(self)
+        self.header = header
+        self.rows = rows
+        self.colWidths = colWidths
+        self.fontName = fontName
+        self.fontSize = fontSize
+        self.headerFontSize = headerFontSize
+        self.rowHeight = rowHeight
+        self.headerHeight = headerHeight
+        self.padding = padding
+        self.hAlign = 'CENTER'
+        
+    def wrap(self, availWidth, availHeight):
+        self.width = sum(self.colWidths)
+        self.height = self.headerHeight + self.rowHeight * len(self.rows)
+        return self.width, self.height
+        
+    def split(self, availWidth, availHeight):
+        """按当前页剩余的高度拆分为两张表格，每张都带表头"""
+        count = int((availHeight - self.headerHeight) // self.rowHeight)
+        if count <= 0 or count >= len(self.rows):
+            return []
+        return [self.copy_with(self.rows[:count]), self.copy_with(self.rows[count:])]
+        
+    def copy_with(self, rows):
+        return GridTable(self.header, rows, self.colWidths, self.fontName, self.fontSize, self.headerFontSize,
+                         self.rowHeight, self.headerHeight, self.padding)
+        
+    def draw(self):
+        canvas = self.canv
+        width, height = self.width, self.height
+        body_top = height - self.headerHeight
+        
+        # 表头背景
+        canvas.setFillColor(colors.lightgrey)
+        canvas.rect(0, body_top, width, self.headerHeight, stroke=0, fill=1)
+        canvas.setFillColor(colors.black)
+        
+        # 整张网格
+        xs = [0]
+        for col_width in self.colWidths:
+            xs.append(xs[-1] + col_width)
+        ys = [height] + [body_top - self.rowHeight * i for i in range(len(self.rows) + 1)]
+        canvas.setLineWidth(1)
+        canvas.grid(xs, ys)
+        
+        # 表头文本居中
+        canvas.setFont(self.fontName, self.headerFontSize)
+        header_y = body_top + (self.headerHeight - self.headerFontSize) / 2 + 2
+        for i, text in enumerate(self.header):
+            canvas.drawCentredString((xs[i] + xs[i + 1]) / 2, header_y, text)
+            
+        # 各行文本放在同一个文本对象中一次输出
+        text_object = canvas.beginText()
+        text_object.setFont(self.fontName, self.fontSize)
+        baseline = (self.rowHeight - self.fontSize) / 2 + 2
+        for row_index, row in enumerate(self.rows):
+            y = body_top - self.rowHeight * (row_index + 1) + baseline
+            for col_index, text in enumerate(row):
+                text_object.setTextOrigin(xs[col_index] + self.padding, y)
+                text_object.textOut(text)
+        canvas.drawText(text_object)
+
+class PdfReportGenerator:
+    def __init__(self, output_path="词法分析报告.pdf"):
+        self.output_path = output_path
+        self.doc = SimpleDocTemplate(
+            output_path,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72
+        )
+        # 样式表在各报告之间共享，创建第一个报告时才查找并注册中文字体
+        self.styles = get_styles()
+        self.font = get_chinese_font()
+        self.elements = []
+        
+    def add_title(self, title):
+        """添加标题"""
+        self.elements.append(Paragraph(title, self.styles['ChineseTitle']))
+        self.elements.append(Spacer(1, 12))
+        
+    def add_heading(self, text, level=1):
+        """添加标题"""
+        if level == 1:
+            self.elements.append(Paragraph(text, self.styles['ChineseHeading1']))
+        else:
+            self.elements.append(Paragraph(text, self.styles['ChineseHeading2']))
+        self.elements.append(Spacer(1, 6))
+        
+    def add_paragraph(self, text):
+        """添加段落"""
+        self.elements.append(Paragraph(text, self.styles['ChineseNormal']))
+        self.elements.append(Spacer(1, 6))
+        
+    def add_code(self, text):
+        """添加代码文本"""
+        # 替换尖括号，避免被解释为HTML标签
+        text = text.replace('<', '&lt;').replace('>', '&gt;')
+        # 使用<pre>标签保留格式，但这可能在某些情况下不起作用
+        # 考虑按行分割并添加每一行
+        lines = text.split('\n')
+        for line in lines:
+            if line.strip():  # 如果行不为空
+                self.elements.append(Paragraph(line, self.styles['ChineseCode']))
+        self.elements.append(Spacer(1, 6))
+        
+    def table_style(self):
+        """表格的默认样式"""
+        return [
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), self.font),
+                ('FONTSIZE', (0, 0), (-1, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTNAME', (0, 1), (-1, -1), self.font),
+                ('FONTSIZE', (0, 1), (-1, -1), 10),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ]
+            
+    def add_table(self, data, colWidths=None, rowHeights=None, style=None):
+        """添加表格"""
+        if style is None:
+            style = self.table_style()
+            
+        table = Table(data, colWidths=colWidths, rowHeights=rowHeights)
+        table.setStyle(TableStyle(style))
+        self.elements.append(table)
+        self.elements.append(Spacer(1, 12))
+        
+    def rows_per_page(self):
+        """一页能容纳的表格行数"""
+        return max(1, int((self.doc.height - TABLE_HEADER_HEIGHT) // TABLE_ROW_HEIGHT) - 1)
+        
+    def add_table_stream(self, header, rows, count, colWidths):
+        """
+        添加分段的大表格
+        
+        rows为产生各行的迭代器，共count行；表格按页分为多段，每段带表头，
+        排版到某一段时才从迭代器中取出该段的行，不在内存中保存整个表格
+        """
+        chunk_rows = self.rows_per_page()
+        
+        def make_table(size):
+            return GridTable(header, list(islice(rows, size)), colWidths, self.font)
+            
+        for start in range(0, count, chunk_rows):
+            self.elements.append(LazyFlowable(partial(make_table, min(chunk_rows, count - start))))
+        self.elements.append(Spacer(1, 12))
+        
+    def add_code_stream(self, text):
+        """添加较长的代码文本，按行分段，排版到某一段时才构造该段"""
+        lines = text.split('\n')
+        
+        def make_code(start):
+            chunk = '\n'.join(lines[start:start + CODE_CHUNK_LINES])
+            chunk = chunk.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            return XPreformatted(chunk, self.styles['ChineseCode'])
+            
+        for start in range(0, len(lines), CODE_CHUNK_LINES):
+            self.elements.append(LazyFlowable(partial(make_code, start)))
+        self.elements.append(Spacer(1, 6))
+        
+    def add_spacer(self, height=12):
+        """添加空白"""
+        self.elements.append(Spacer(1, height))
+        
+    def add_page_break(self):
+        """添加分页"""
+        self.elements.append(PageBreak())
+        
+    def build(self, verbose=True):
+        """生成PDF文档，返回是否成功"""
+        try:
+            self.doc.build(self.elements)
+            if verbose:
+                print(f"PDF报告已生成: {self.output_path}")
+            return True
+        except Exception as e:
+            print(f"生成PDF报告时出错: {e}")
+            return False
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+正则表达式扫描引擎
+将语言配置中的各单词表合并为一个带命名分组的正则表达式，用finditer遍历整个缓冲区，
+由C实现的正则引擎完成逐字符匹配，输出与手写扫描器完全一致的单词序列
+"""
+
+import re
+
+from lexical_analyzer import TYPE_KEYWORD, TYPE_DELIMITER, TYPE_CONSTANT, TYPE_IDENTIFIER
+
+
+def _numeric_chars(chars):
+    """
+    从chars中挑出正则字符类与str方法不一致的字符
+
+    返回 (isdigit但不是十进制数字的字符集合, isnumeric但不是十进制数字的字符集合)，
+    用于让 \\d 与 str.isdigit 一致，并让标识符首字符与 str.isalpha 一致
+    """
+    numerics = {char for char in chars if char.isnumeric() and not char.isdecimal()}
+    return {char for char in numerics if char.isdigit()}, numerics
+
+
+class RegexScanner:
+    def __init__(self, profile, recovery=False):
+        self.keywords = profile.keyword_set
+        self.delimiters = list(profile.delimiters)
+        self.operator_table = profile.operator_table
+        self.illegal_chars = profile.illegal_chars
+        self.token_starts = profile.token_starts
+        # 恢复模式下把一段连续的未识别字符合并为一个错误单词
+        self.recovery = recovery
+        self.pattern = self.build_pattern()
+        # 非ASCII文本使用的正则: (已检查过的字符, 补充的数字字符, 补充的数值字符, 正则)，
+        # 各字符在首次出现时检查，整体替换以便多个线程共用同一个扫描器
+        self.unicode_state = (frozenset(), frozenset(), frozenset(), self.pattern)
+        self.bytes_pattern = None
+        # 字节模式下关键字、分界符和运算符直接查表得到字符串，不必解码
+        self.byte_keywords = {word.encode('utf-8'): word for word in profile.keywords}
+        self.byte_symbols = {op.encode('utf-8'): op for op in self.delimiters + list(self.operator_table)}
+
+    def build_pattern(self, extra_digits='', extra_numerics=''):
+        """构造主正则表达式"""
+        digit = r'[\d%s]' % re.escape(extra_digits)
+        alpha = r'[^\W\d%s]' % re.escape(extra_numerics)
+        return re.compile(self.build_source(r'\s', r'\w', digit, alpha, r'[^\S\n]'), re.DOTALL)
+
+    def build_bytes_pattern(self):
+        """
+        构造用于ASCII字节缓冲区的主正则表达式
+        字节模式的 \\s 不包含\\x1c-\\x1f，因此按str.isspace显式列出各字符类
+        """
+        def char_class(test):
+            return '[%s]' % ''.join(re.escape(chr(code)) for code in range(128) if test(chr(code)))
+        source = self.build_source(
+            char_class(str.isspace),
+            char_class(lambda char: char.isalnum() or char == '_'),
+            char_class(str.isdigit),
+            char_class(lambda char: char.isalpha() or char == '_'),
+            char_class(lambda char: char.isspace() and char != '\n'))
+        return re.compile(source.encode('utf-8'), re.DOTALL)
+
+    def build_source(self, space, word, digit, alpha, gap):
+        """由各字符类拼出主正则表达式的源文本，gap为换行以外的空白字符"""
+        # 运算符按长度降序排列，分支按顺序尝试，匹配到的即为最长的运算符
+        operators = sorted(self.operator_table, key=len, reverse=True)
+
+        alternatives = [
+            r'(?P<ident>%s%s*)' % (alpha, word),
+            r'(?P<number>%s+(?P<fraction>\.%s*)?(?P<tail>%s%s*)?)' % (digit, digit, alpha, word),
+        ]
+        if self.delimiters:
+            alternatives.append(r'(?P<delimiter>[%s])' % ''.join(re.escape(c) for c in self.delimiters))
+        if operators:
+            alternatives.append(r'(?P<operator>%s)' % '|'.join(re.escape(op) for op in operators))
+        alternatives += [
+            r'(?P<string>"[^"]*")',
+            r'(?P<open_string>"[^"]*)',
+        ]
+        if self.illegal_chars:
+            alternatives.append(r'(?P<illegal>[%s])' % ''.join(re.escape(c) for c in self.illegal_chars))
+        if self.recovery:
+            # 未识别的字符：不是空白、字母、数字，也不能开始其他单词；
+            # 一段这样的字符可以隔着换行以外的空白，结束于最后一个未识别的字符
+            unknown = r'(?:(?!%s|%s|%s|[%s]).)' % (
+                space, alpha, digit, ''.join(re.escape(c) for c in sorted(self.token_starts)))
+            alternatives.append(r'(?P<unknown>%s(?:%s*%s)*)' % (unknown, gap, unknown))
+        alternatives += [
+            r'(?P<end>\Z)',
+            r'(?P<other>.)',
+        ]
+        return r'%s*(?:%s)' % (space, '|'.join(alternatives))
+
+    def get_pattern(self, text):
+        """
+        ASCII文本直接使用主正则；其他文本使用补充了数字字符集的版本，
+        只检查文本中出现的字符，遇到新的数字字符时才重新编译
+        """
+        if text.isascii():
+            return self.pattern
+        seen, digits, numerics, pattern = self.unicode_state
+        new_chars = set(text)
+        new_chars -= seen
+        if not new_chars:
+            return pattern
+        new_digits, new_numerics = _numeric_chars(new_chars)
+        if new_numerics:
+            digits |= new_digits
+            numerics |= new_numerics
+            pattern = self.build_pattern(''.join(sorted(digits)), ''.join(sorted(numerics)))
+        self.unicode_state = (seen | new_chars, digits, numerics, pattern)
+        return pattern
+
+    def scan(self, text, start=0):
+        """
+        扫描整个缓冲区
+
+        逐个产生 (类型, 值, 定位偏移, 结束偏移, 错误信息) 记录，格式与DfaScanner相同；
+        start为开始扫描的偏移，调用者需保证该位置不在单词中间，记录的偏移仍相对于整个缓冲区
+        """
+        keywords = self.keywords
+        operator_table = self.operator_table
+        last = len(text) - 1
+
+        for match in self.get_pattern(text).finditer(text, start):
+            kind = match.lastgroup
+            start, end = match.span(kind)
+
+            if kind == 'ident':
+                lexeme = text[start:end]
+                if lexeme in keywords:
+                    yield (TYPE_KEYWORD, lexeme, start, end, None)
+                else:
+                    yield (TYPE_IDENTIFIER, lexeme, start, end, None)
+            elif kind == 'delimiter':
+                yield (TYPE_DELIMITER, text[start:end], start, end, None)
+            elif kind == 'operator':
+                token_type, value, error_msg = operator_table[text[start:end]]
+                yield (token_type, value, start, end, error_msg)
+            elif kind == 'number':
+                tail = match.group('tail')
+                fraction = match.group('fraction')
+                if tail:
+                    # 手写扫描器会把第一个非法字符重复记录一次
+                    number = text[start:match.start('tail')]
+                    error_msg = f"非法的数字常量: {number}{tail[0]}{tail}"
+                    yield ('Error', error_msg, min(end, last), end, error_msg)
+                elif fraction == '.':
+                    error_msg = f"非法的数字常量: {text[start:end]}"
+                    yield ('Error', error_msg, min(end, last), end, error_msg)
+                else:
+                    yield (TYPE_CONSTANT, text[start:end], start, end, None)
+            elif kind == 'string':
+                yield (TYPE_CONSTANT, text[start:end], start, end, None)
+            elif kind == 'open_string':
+                error_msg = f"未闭合的字符串常量: {text[start:end]}"
+                yield ('Error', error_msg, last, end, error_msg)
+            elif kind == 'illegal':
+                error_msg = f"{self.illegal_chars[text[start]]}: {text[start]}"
+                yield ('Error', error_msg, start, end, error_msg)
+            elif kind == 'other' or kind == 'unknown':
+                error_msg = f"未识别的字符: {text[start:end]}"
+                yield ('Error', error_msg, start, end, error_msg)
+
+    def scan_bytes(self, buffer):
+        """
+        直接扫描只含ASCII字符的字节缓冲区（如内存映射的文件）
+
+        正则引擎在缓冲区上原地匹配，只有标识符、数字和字符串常量的切片需要解码，
+        记录格式与scan相同，偏移即字节偏移
+        """
+        if self.bytes_pattern is None:
+            self.bytes_pattern = self.build_bytes_pattern()
+        byte_keywords = self.byte_keywords
+        byte_symbols = self.byte_symbols
+        operator_table = self.operator_table
+        last = len(buffer) - 1
+
+        for match in self.bytes_pattern.finditer(buffer):
+            kind = match.lastgroup
+            start, end = match.span(kind)
+
+            if kind == 'ident':
+                lexeme = buffer[start:end]
+                keyword = byte_keywords.get(lexeme)
+                if keyword is not None:
+                    yield (TYPE_KEYWORD, keyword, start, end, None)
+                else:
+                    yield (TYPE_IDENTIFIER, lexeme.decode('ascii'), start, end, None)
+            elif kind == 'delimiter':
+                yield (TYPE_DELIMITER, byte_symbols[buffer[start:end]], start, end, None)
+            elif kind == 'operator':
+                token_type, value, error_msg = operator_table[byte_symbols[buffer[start:end]]]
+                yield (token_type, value, start, end, error_msg)
+            elif kind == 'number':
+                tail = match.group('tail')
+                lexeme = buffer[start:end].decode('ascii')
+                if tail:
+                    number = lexeme[:match.start('tail') - start]
+                    tail = tail.decode('ascii')
+                    error_msg = f"非法的数字常量: {number}{tail[0]}{tail}"
+                    yield ('Error', error_msg, min(end, last), end, error_msg)
+                elif match.group('fraction') == b'.':
+                    error_msg = f"非法的数字常量: {lexeme}"
+                    yield ('Error', error_msg, min(end, last), end, error_msg)
+                else:
+                    yield (TYPE_CONSTANT, lexeme, start, end, None)
+            elif kind == 'string':
+                yield (TYPE_CONSTANT, buffer[start:end].decode('ascii'), start, end, None)
+            elif kind == 'open_string':
+                error_msg = f"未闭合的字符串常量: {buffer[start:end].decode('ascii')}"
+                yield ('Error', error_msg, last, end, error_msg)
+            elif kind == 'illegal':
+                char = buffer[start:end].decode('ascii')
+                error_msg = f"{self.illegal_chars[char]}: {char}"
+                yield ('Error', error_msg, start, end, error_msg)
+            elif kind == 'other' or kind == 'unknown':
+                error_msg = f"未识别的字符: {buffer[start:end].decode('ascii')}"
+                yield ('Error', error_msg, start, end, error_msg)
@@ -3,232 +3,146 @@
 
 """
 词法分析结果PDF报告生成器
-将词法分析结果输出为美观的PDF文档
+将词法分析结果输出为美观的PDF文档；排版和ReportLab的导入在pdf_document.py中，生成报告时才导入
 """
 
 import os
-import sys
+import argparse
 from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from collections import Counter
 
-from lexical_analyzer import LexicalAnalyzer, identifiers, constants
+from lexical_analyzer import LexicalAnalyzer, TYPE_KEYWORD, TYPE_DELIMITER, TYPE_OPERATOR, TYPE_RELATIONAL, TYPE_CONSTANT, TYPE_IDENTIFIER
+from token_cache import TokenCache, analyze_file
 
-# 注册中文字体（如果需要显示中文）
-try:
-    # 尝试注册系统中可能存在的中文字体
-    pdfmetrics.registerFont(TTFont('SimSun', '/System/Library/Fonts/PingFang.ttc'))
-    chinese_font = 'SimSun'
-except:
-    try:
-        # 尝试其他可能的字体路径
-        pdfmetrics.registerFont(TTFont('SimSun', '/Library/Fonts/Arial Unicode.ttf'))
-        chinese_font = 'SimSun'
-    except:
-        try:
-            # 尝试更多可能的字体路径
-            pdfmetrics.registerFont(TTFont('SimSun', '/System/Library/Fonts/STHeiti Light.ttc'))
-            chinese_font = 'SimSun'
-        except:
-            # 如果找不到中文字体，使用默认字体
-            chinese_font = 'Helvetica'
-            print("警告: 未找到中文字体，PDF中的中文可能无法正确显示")
+# 符号表超过这个长度时以分段表格代替一整段文字列出
+SYMBOL_PARAGRAPH_LIMIT = 200
 
-class PdfReportGenerator:
-    def __init__(self, output_path="词法分析报告.pdf"):
-        self.output_path = output_path
-        self.doc = SimpleDocTemplate(
-            output_path,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        self.styles = getSampleStyleSheet()
-        self.init_styles()
-        self.elements = []
-        
-    def init_styles(self):
-        """初始化自定义样式"""
-        # 添加自定义样式
-        self.styles.add(ParagraphStyle(
-            name='ChineseTitle',
-            parent=self.styles['Title'],
-            fontName=chinese_font,
-            fontSize=20,
-            alignment=TA_CENTER,
-            spaceAfter=12
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='ChineseHeading1',
-            parent=self.styles['Heading1'],
-            fontName=chinese_font,
-            fontSize=16,
-            alignment=TA_LEFT,
-            spaceAfter=8
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='ChineseHeading2',
-            parent=self.styles['Heading2'],
-            fontName=chinese_font,
-            fontSize=14,
-            alignment=TA_LEFT,
-            spaceAfter=6
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='ChineseNormal',
-            parent=self.styles['Normal'],
-            fontName=chinese_font,
-            fontSize=12,
-            alignment=TA_LEFT,
-            spaceAfter=6
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='ChineseCode',
-            parent=self.styles['Code'],
-            fontName='Courier',
-            fontSize=10,
-            alignment=TA_LEFT,
-            spaceAfter=6
-        ))
+# 报告内容：full为源代码和完整的单词表，summary为类型分布、最常见的标识符和错误列表，errors只列出错误
+REPORT_MODES = ('full', 'summary', 'errors')
 
-    def add_title(self, title):
-        """添加标题"""
-        self.elements.append(Paragraph(title, self.styles['ChineseTitle']))
-        self.elements.append(Spacer(1, 12))
-        
-    def add_heading(self, text, level=1):
-        """添加标题"""
-        if level == 1:
-            self.elements.append(Paragraph(text, self.styles['ChineseHeading1']))
+# 词法分析结果表的表头和列宽
+TOKEN_TABLE_HEADER = ["单词", "二元序列", "类型", "位置（行，列）"]
+TOKEN_TABLE_WIDTHS = [120, 120, 100, 100]
+
+
+def iter_token_rows(analyzer):
+    """逐行产生词法分析结果表的内容"""
+    for token in analyzer.tokens:
+        if token['type'] == 'Error':
+            type_name = "Error"
+            attribute = "Error"
+            yield [token['value'], f"({type_name},{attribute})", type_name, f"({token['line']}, {token['column']})"]
         else:
-            self.elements.append(Paragraph(text, self.styles['ChineseHeading2']))
-        self.elements.append(Spacer(1, 6))
-        
-    def add_paragraph(self, text):
-        """添加段落"""
-        self.elements.append(Paragraph(text, self.styles['ChineseNormal']))
-        self.elements.append(Spacer(1, 6))
-        
-    def add_code(self, text):
-        """添加代码文本"""
-        # 替换尖括号，避免被解释为HTML标签
-        text = text.replace('<', '&lt;').replace('>', '&gt;')
-        # 使用<pre>标签保留格式，但这可能在某些情况下不起作用
-        # 考虑按行分割并添加每一行
-        lines = text.split('\n')
-        for line in lines:
-            if line.strip():  # 如果行不为空
-                self.elements.append(Paragraph(line, self.styles['ChineseCode']))
-        self.elements.append(Spacer(1, 6))
-        
-    def add_table(self, data, colWidths=None, rowHeights=None, style=None):
-        """添加表格"""
-        if style is None:
-            style = [
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), chinese_font),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), chinese_font),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]
-            
-        table = Table(data, colWidths=colWidths, rowHeights=rowHeights)
-        table.setStyle(TableStyle(style))
-        self.elements.append(table)
-        self.elements.append(Spacer(1, 12))
-        
-    def add_spacer(self, height=12):
-        """添加空白"""
-        self.elements.append(Spacer(1, height))
-        
-    def add_page_break(self):
-        """添加分页"""
-        self.elements.append(PageBreak())
-        
-    def build(self):
-        """生成PDF文档"""
-        try:
-            self.doc.build(self.elements)
-            print(f"PDF报告已生成: {self.output_path}")
-        except Exception as e:
-            print(f"生成PDF报告时出错: {e}")
+            type_name = analyzer.get_type_name(token['type'])
+            attribute = token['value']
+            yield [token['value'], f"({token['type']},{attribute})", type_name, f"({token['line']}, {token['column']})"]
+
+def summarize_tokens(analyzer):
+    """遍历一次单词序列，统计各类型的单词数、各标识符的出现次数，并收集错误"""
+    type_counts = Counter()
+    identifier_counts = Counter()
+    errors = []
+    for token in analyzer.tokens:
+        type_counts[token['type']] += 1
+        if token['type'] == TYPE_IDENTIFIER:
+            identifier_counts[token['value']] += 1
+        elif token['type'] == 'Error':
+            errors.append([token['error_msg'], str(token['line']), str(token['column'])])
+    return type_counts, identifier_counts, errors
 
-def generate_token_report(analyzer, file_path=None, description=None, report_generator=None):
-    """将词法分析结果转换为PDF报告的一部分"""
+def generate_token_report(analyzer, file_path=None, description=None, report_generator=None, mode='full', top_n=20):
+    """
+    将词法分析结果转换为PDF报告的一部分
+    
+    mode为full时列出源代码和全部单词，单词表按页分段，排版时才逐段从单词序列中取出；
+    summary只列出类型分布、出现最多的top_n个标识符和错误；errors只列出错误
+    """
     if report_generator is None:
+        from pdf_document import PdfReportGenerator
         report_generator = PdfReportGenerator()
         
     # 添加分析文件信息
     if file_path:
         report_generator.add_heading(f"文件分析: {os.path.basename(file_path)}", 1)
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            report_generator.add_heading("源代码", 2)
-            report_generator.add_code(content)
-        except Exception as e:
-            report_generator.add_paragraph(f"无法读取源文件: {e}")
+        if mode == 'full':
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                report_generator.add_heading("源代码", 2)
+                report_generator.add_code_stream(content)
+            except Exception as e:
+                report_generator.add_paragraph(f"无法读取源文件: {e}")
     elif description:
         report_generator.add_heading(f"代码分析: {description}", 1)
-        try:
-            report_generator.add_heading("源代码", 2)
-            report_generator.add_code("""If i=0 then n++;
-a<= 3b %);""")
-        except Exception as e:
-            report_generator.add_paragraph(f"无法显示源代码: {e}")
-        
-    # 添加分析结果表格
-    report_generator.add_heading("词法分析结果", 2)
-    
-    # 表头
-    table_data = [["单词", "二元序列", "类型", "位置（行，列）"]]
-    
-    # 表格内容
-    for token in analyzer.tokens:
-        if token['type'] == 'Error':
-            type_name = "Error"
-            attribute = "Error"
-            row = [token['value'], f"({type_name},{attribute})", type_name, f"({token['line']}, {token['column']})"]
-        else:
-            type_name = analyzer.get_type_name(token['type'])
-            attribute = token['value']
-            row = [token['value'], f"({token['type']},{attribute})", type_name, f"({token['line']}, {token['column']})"]
-        table_data.append(row)
-    
-    # 设置列宽
-    col_widths = [120, 120, 100, 100]
-    report_generator.add_table(table_data, colWidths=col_widths)
+        if mode == 'full':
+            try:
+                report_generator.add_heading("源代码", 2)
+                report_generator.add_code(analyzer.content)
+            except Exception as e:
+                report_generator.add_paragraph(f"无法显示源代码: {e}")
+                
+    if mode == 'full':
+        # 添加分析结果表格
+        report_generator.add_heading("词法分析结果", 2)
+        report_generator.add_table_stream(TOKEN_TABLE_HEADER, iter_token_rows(analyzer), len(analyzer.tokens),
+                                          colWidths=TOKEN_TABLE_WIDTHS)
+        
+        # 添加统计信息
+        report_generator.add_heading("分析统计", 2)
+        for name, table in (("标识符表", analyzer.identifiers), ("常数表", analyzer.constants)):
+            if len(table) <= SYMBOL_PARAGRAPH_LIMIT:
+                report_generator.add_paragraph(f"{name}: {table}")
+            else:
+                report_generator.add_paragraph(f"{name}: {len(table)}项")
+                rows = ([str(index), symbol] for index, symbol in enumerate(table))
+                report_generator.add_table_stream(["序号", name], rows, len(table), colWidths=[80, 360])
+        report_generator.add_paragraph(f"错误数量: {analyzer.error_count}")
+        return report_generator
+        
+    type_counts, identifier_counts, errors = summarize_tokens(analyzer)
+    total = len(analyzer.tokens)
     
-    # 添加统计信息
     report_generator.add_heading("分析统计", 2)
-    report_generator.add_paragraph(f"标识符表: {identifiers}")
-    report_generator.add_paragraph(f"常数表: {constants}")
-    report_generator.add_paragraph(f"错误数量: {analyzer.error_count}")
+    report_generator.add_paragraph(f"单词总数: {total}")
+    report_generator.add_paragraph(f"标识符表: {len(analyzer.identifiers)}个不同的标识符")
+    report_generator.add_paragraph(f"常数表: {len(analyzer.constants)}个不同的常数")
+    report_generator.add_paragraph(f"错误数量: {len(errors)}")
+    
+    if mode == 'summary':
+        # 类型分布
+        report_generator.add_heading("单词类型分布", 2)
+        histogram = [["类型", "单词数", "比例"]]
+        for type_code in (TYPE_KEYWORD, TYPE_DELIMITER, TYPE_OPERATOR, TYPE_RELATIONAL, TYPE_CONSTANT, TYPE_IDENTIFIER, 'Error'):
+            count = type_counts.get(type_code, 0)
+            histogram.append([analyzer.get_type_name(type_code), str(count), f"{count * 100 / total:.1f}%" if total else "0.0%"])
+        report_generator.add_table(histogram, colWidths=[120, 100, 100])
+        
+        # 出现最多的标识符
+        report_generator.add_heading(f"出现最多的{top_n}个标识符", 2)
+        top_identifiers = [["标识符", "出现次数"]]
+        for identifier, count in identifier_counts.most_common(top_n):
+            top_identifiers.append([identifier, str(count)])
+        report_generator.add_table(top_identifiers, colWidths=[200, 100])
+        
+    # 错误列表
+    report_generator.add_heading("错误列表", 2)
+    if errors:
+        report_generator.add_table_stream(["错误", "行号", "列号"], iter(errors), len(errors), colWidths=[280, 80, 80])
+    else:
+        report_generator.add_paragraph("没有错误")
     
     return report_generator
 
-def generate_report_from_file(file_path, output_path=None):
-    """从源文件生成PDF报告"""
+def generate_report_from_file(file_path, output_path=None, use_cache=True, mode='full'):
+    """
+    从源文件生成PDF报告，use_cache为True时同一文件的分析结果从单词序列缓存中读取
+    mode为报告内容，见REPORT_MODES
+    """
     if not output_path:
         base_name = os.path.splitext(os.path.basename(file_path))[0]
         output_path = f"{base_name}_分析报告.pdf"
         
+    from pdf_document import PdfReportGenerator
     report_generator = PdfReportGenerator(output_path)
     
     # 添加报告标题和生成时间
@@ -238,22 +152,31 @@ def generate_report_from_file(file_path, output_path=None):
     report_generator.add_paragraph(f"生成时间: {now}")
     
     # 分析文件
-    analyzer = LexicalAnalyzer()
-    if analyzer.load_file(file_path):
-        analyzer.analyze()
-        generate_token_report(analyzer, file_path, None, report_generator)
+    analyzer = analyze_file(file_path, TokenCache() if use_cache else None)
+    if analyzer is not None:
+        generate_token_report(analyzer, file_path, None, report_generator, mode)
         
     # 生成PDF
     report_generator.build()
     
     return output_path
 
-def generate_report_from_examples():
-    """生成包含多个示例的综合报告"""
-    # 清空标识符和常数表
-    identifiers.clear()
-    constants.clear()
-    
+# 综合报告中的示例：测试文件和题目中的测试例子
+EXAMPLE_FILES = ("test.c", "test_complex.c")
+EXAMPLE_CODE = ("题目中的测试例子", """If i=0 then n++;
+a<= 3b %);""")
+
+def generate_report_from_examples(jobs=1):
+    """
+    生成包含多个示例的综合报告
+    jobs不为1时各示例在工作进程中分别排版后拼接，见parallel_report.py
+    """
+    if jobs != 1:
+        from parallel_report import file_section, code_section, generate_parallel_report
+        sections = [file_section(path) for path in EXAMPLE_FILES] + [code_section(*EXAMPLE_CODE)]
+        return generate_parallel_report(sections, "词法分析综合报告.pdf", "词法分析综合报告", jobs)
+        
+    from pdf_document import PdfReportGenerator
     report_generator = PdfReportGenerator("词法分析综合报告.pdf")
     
     # 添加报告标题和生成时间
@@ -264,32 +187,27 @@ def generate_report_from_examples():
     
     # 分析简单测试文件
     analyzer = LexicalAnalyzer()
-    if analyzer.load_file("test.c"):
+    if analyzer.load_file(EXAMPLE_FILES[0]):
         analyzer.analyze()
-        generate_token_report(analyzer, "test.c", None, report_generator)
+        generate_token_report(analyzer, EXAMPLE_FILES[0], None, report_generator)
         
     # 添加分页
     report_generator.add_page_break()
     
     # 分析复杂测试文件
-    identifiers.clear()
-    constants.clear()
     analyzer = LexicalAnalyzer()
-    if analyzer.load_file("test_complex.c"):
+    if analyzer.load_file(EXAMPLE_FILES[1]):
         analyzer.analyze()
-        generate_token_report(analyzer, "test_complex.c", None, report_generator)
+        generate_token_report(analyzer, EXAMPLE_FILES[1], None, report_generator)
         
     # 添加分页
     report_generator.add_page_break()
     
     # 分析题目示例
-    identifiers.clear()
-    constants.clear()
     analyzer = LexicalAnalyzer()
-    analyzer.load_string("""If i=0 then n++;
-a<= 3b %);""")
+    analyzer.load_string(EXAMPLE_CODE[1])
     analyzer.analyze()
-    generate_token_report(analyzer, None, "题目中的测试例子", report_generator)
+    generate_token_report(analyzer, None, EXAMPLE_CODE[0], report_generator)
     
     # 生成PDF
     report_generator.build()
@@ -297,20 +215,27 @@ a<= 3b %);""")
     return "词法分析综合报告.pdf"
 
 def main():
-    # 检查命令行参数
-    if len(sys.argv) < 2:
-        print("用法: python report_generator.py <源程序文件> [输出PDF文件]")
-        print("或使用: python report_generator.py --all (生成所有示例的综合报告)")
-        return
-        
-    if sys.argv[1] == "--all":
-        output_path = generate_report_from_examples()
+    parser = argparse.ArgumentParser(description='词法分析PDF报告生成器',
+                                     usage='python report_generator.py <源程序文件> [输出PDF文件] [--mode MODE]\n'
+                                           '或使用: python report_generator.py --all (生成所有示例的综合报告)')
+    parser.add_argument('input', nargs='?', help='源程序文件')
+    parser.add_argument('output', nargs='?', help='输出PDF文件')
+    parser.add_argument('--all', action='store_true', help='生成所有示例的综合报告')
+    parser.add_argument('--mode', choices=REPORT_MODES, default='full',
+                        help='报告内容: full完整单词表, summary类型分布、常见标识符和错误, errors只列出错误')
+    parser.add_argument('--no-cache', action='store_true', help='不使用单词序列缓存')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='综合报告并行排版的进程数，0为CPU核数，默认为1（依次排版）')
+    args = parser.parse_args()
+    
+    if args.all:
+        output_path = generate_report_from_examples(args.jobs)
         print(f"综合报告已生成: {output_path}")
-    else:
-        input_file = sys.argv[1]
-        output_path = sys.argv[2] if len(sys.argv) > 2 else None
-        output_path = generate_report_from_file(input_file, output_path)
+    elif args.input:
+        output_path = generate_report_from_file(args.input, args.output, not args.no_cache, args.mode)
         print(f"报告已生成: {output_path}")
+    else:
+        parser.print_usage()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
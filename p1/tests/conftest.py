@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+"""测试配置：各模块以p1目录为导入根目录"""
+
+import os
+import sys
+
+P1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if P1_DIR not in sys.path:
+    sys.path.insert(0, P1_DIR)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+"""各扫描引擎对示例文件的输出与手写扫描器逐个单词一致"""
+
+import os
+
+import pytest
+
+from lexical_analyzer import LexicalAnalyzer, BACKENDS
+
+P1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_FILES = ('test.c', 'test_complex.c')
+
+
+def analyze_file(backend, filename):
+    analyzer = LexicalAnalyzer(backend=backend)
+    assert analyzer.load_file(os.path.join(P1_DIR, filename))
+    return analyzer.analyze(), analyzer
+
+
+@pytest.mark.parametrize('filename', EXAMPLE_FILES)
+@pytest.mark.parametrize('backend', [backend for backend in BACKENDS if backend != 'default'])
+def test_backend_matches_default(backend, filename):
+    expected, expected_analyzer = analyze_file('default', filename)
+    tokens, analyzer = analyze_file(backend, filename)
+    assert expected
+    assert len(tokens) == len(expected)
+    for index, (token, expected_token) in enumerate(zip(tokens, expected)):
+        assert token == expected_token, f"第{index}个单词不一致"
+    assert analyzer.identifiers == expected_analyzer.identifiers
+    assert analyzer.constants == expected_analyzer.constants
+    assert analyzer.error_count == expected_analyzer.error_count
+
+
+@pytest.mark.parametrize('source', ['x = ½ + é;', 'a² <= 3² then Ⅻ①;', 'β = 9½ ٣ 〇x'])
+def test_backends_match_default_on_non_ascii_numerics(source):
+    results = []
+    for backend in BACKENDS:
+        analyzer = LexicalAnalyzer(backend=backend)
+        analyzer.load_string(source)
+        results.append(analyzer.analyze())
+    assert all(tokens == results[0] for tokens in results)
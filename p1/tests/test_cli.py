@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+"""命令行模式作为管道的一级使用：下游提前关闭管道时安静地退出"""
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+P1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('output_format', ['text', 'jsonl', 'csv', 'columnar'])
+def test_closed_pipe_exits_quietly(tmp_path, output_format):
+    with open(os.path.join(P1_DIR, 'test_complex.c'), encoding='utf-8') as f:
+        source = f.read()
+    path = tmp_path / 'big.c'
+    path.write_text(source * 200, encoding='utf-8')
+
+    process = subprocess.Popen([sys.executable, 'main.py', '-f', str(path), '--format', output_format],
+                               cwd=P1_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    process.stdout.read(100)
+    process.stdout.close()
+    stderr = process.stderr.read()
+    process.wait(timeout=60)
+    process.stderr.close()
+    assert process.returncode == 1
+    assert stderr == b''
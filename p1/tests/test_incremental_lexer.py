@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""增量分析：随机插入和删除后，增量分析的结果与对整个源代码重新分析的结果一致"""
+
+import os
+import random
+
+import pytest
+
+from lexical_analyzer import LexicalAnalyzer
+from incremental_lexer import IncrementalLexer
+
+P1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 插入的片段，包括未闭合的字符串、多字符运算符的各部分和跨行的内容
+FRAGMENTS = ['"', '"s"', '"a\nb', '\n', '\n\n', ' ', '<', '=', '<=', '>', '>=', '<>', '+', '++', ':=',
+             '@', '%', '#', '3', '3.', '.5', '12ab', 'x', 'if', 'then', ';', '(', ')', 'a = "open',
+             'i < 10;\n', 'é', '½']
+
+
+def token_fields(token):
+    return (token.type, token.value, token.line, token.column, token.attribute, token.error_msg)
+
+
+def full_analysis(text):
+    analyzer = LexicalAnalyzer()
+    analyzer.load_string(text)
+    return analyzer.analyze(), analyzer
+
+
+def apply_patch(tokens, patch):
+    """与图形界面中TokenTableModel.apply_patch相同的修改"""
+    tokens[patch.start_row:patch.start_row + patch.removed] = patch.tokens
+    if patch.line_shift:
+        for token in tokens[patch.tail_row:]:
+            token.line += patch.line_shift
+    for row, attribute in patch.attributes:
+        tokens[row].attribute = attribute
+
+
+def random_edit(rng, text):
+    position = rng.randint(0, len(text))
+    if text and rng.random() < 0.4:
+        return text[:position] + text[position + rng.randint(1, 8):]
+    return text[:position] + rng.choice(FRAGMENTS) + text[position:]
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_random_edits_match_full_analysis(seed):
+    rng = random.Random(seed)
+    with open(os.path.join(P1_DIR, 'test_complex.c' if seed % 2 else 'test.c'), encoding='utf-8') as f:
+        text = f.read()
+    lexer = IncrementalLexer()
+    patched = []
+    apply_patch(patched, lexer.update(text))
+
+    for step in range(80):
+        text = random_edit(rng, text)
+        apply_patch(patched, lexer.update(text))
+        expected, analyzer = full_analysis(text)
+        expected = [token_fields(token) for token in expected]
+        assert [token_fields(token) for token in lexer.tokens()] == expected, f"第{step}次修改后不一致"
+        assert [token_fields(token) for token in patched] == expected, f"第{step}次修改后的补丁不一致"
+        assert list(lexer.identifiers) == list(analyzer.identifiers)
+        assert list(lexer.constants) == list(analyzer.constants)
+        assert lexer.token_count == len(expected)
+        assert lexer.error_count == analyzer.error_count
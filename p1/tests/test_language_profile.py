@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""语言配置的载入和检查"""
+
+import json
+
+import pytest
+
+from language_profile import LanguageProfile, load_profile
+
+VALID = {
+    'keywords': ['if', 'then'],
+    'delimiters': [';', '('],
+    'operators': {'+': 16},
+    'relational_operators': {'<': 0, '<=': '0x01'},
+    'error_operators': {'++': '非法的运算符'},
+    'illegal_chars': {'%': '非法的字符'},
+}
+
+
+def write_profile(tmp_path, data):
+    path = tmp_path / 'profile.json'
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def test_valid_profile(tmp_path):
+    profile = load_profile(write_profile(tmp_path, VALID))
+    assert profile.keywords == ['if', 'then']
+    assert profile.relational_operators == {'<': 0, '<=': 1}
+
+
+@pytest.mark.parametrize('key, value', [
+    ('operators', []),
+    ('operators', '+'),
+    ('relational_operators', ['<']),
+    ('error_operators', ['++']),
+    ('illegal_chars', ['%']),
+    ('keywords', 'if'),
+    ('keywords', ['if', 1]),
+    ('delimiters', ';'),
+    ('delimiters', {';': 0}),
+    ('name', 3),
+])
+def test_malformed_profile_names_key(tmp_path, key, value):
+    data = dict(VALID, **{key: value})
+    with pytest.raises(ValueError, match=key):
+        load_profile(write_profile(tmp_path, data))
+
+
+@pytest.mark.parametrize('operators', [{'+': [16]}, {'+': 1.5}, {'+': True}, {'+': 'x'}])
+def test_malformed_operator_code(operators):
+    with pytest.raises(ValueError):
+        LanguageProfile.from_dict(dict(VALID, operators=operators))
+
+
+def test_profile_must_be_object(tmp_path):
+    with pytest.raises(ValueError):
+        load_profile(write_profile(tmp_path, ['if']))
+
+
+def test_unknown_key():
+    with pytest.raises(ValueError, match='extra'):
+        LanguageProfile.from_dict(dict(VALID, extra=1))
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""词法分析服务：请求出错时服务继续运行"""
+
+import os
+import sys
+import json
+import socket
+import subprocess
+
+import pytest
+
+from lexer_service import LexerService, serve_socket
+
+P1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request_lines(*requests):
+    return ''.join(json.dumps(request, ensure_ascii=False) + '\n' for request in requests).encode('utf-8')
+
+
+def test_bad_request_then_good_request(tmp_path):
+    bad_profile = tmp_path / 'bad.json'
+    bad_profile.write_text('{"operators": []}', encoding='utf-8')
+    chunks = [request_lines({'id': 1, 'source': 'a', 'profile': str(bad_profile)},
+                            {'id': 2, 'source': 'a @ @', 'max_errors': 'x', 'recover': True},
+                            {'id': 3, 'source': 'if a <= 1 then b;'})]
+    sent = []
+    LexerService().serve(lambda size: chunks.pop() if chunks else b'', sent.append)
+    responses = [json.loads(line) for line in b''.join(sent).decode('utf-8').splitlines()]
+    assert [(response['id'], response['ok']) for response in responses] == [(1, False), (2, False), (3, True)]
+    assert 'operators' in responses[0]['error']
+    assert responses[2]['token_count'] == 7
+
+
+def test_unexpected_exception_becomes_error_reply(monkeypatch):
+    service = LexerService()
+
+    def fail(request):
+        raise AttributeError('boom')
+
+    monkeypatch.setattr(service, 'analyze', fail)
+    assert json.loads(service.handle_line(b'{"id": 7, "source": "a"}')) == {'id': 7, 'ok': False, 'error': 'boom'}
+
+
+def test_stdio_service_survives_bad_request(tmp_path):
+    bad_profile = tmp_path / 'bad.json'
+    bad_profile.write_text('{"operators": []}', encoding='utf-8')
+    process = subprocess.run(
+        [sys.executable, 'lexer_service.py'], cwd=P1_DIR, capture_output=True, timeout=60,
+        input=request_lines({'id': 1, 'source': 'a', 'profile': str(bad_profile)}, {'id': 2, 'path': 'test.c'}))
+    assert process.returncode == 0
+    responses = [json.loads(line) for line in process.stdout.decode('utf-8').splitlines()]
+    assert [(response['id'], response['ok']) for response in responses] == [(1, False), (2, True)]
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='需要Unix套接字')
+def test_socket_refuses_to_replace_regular_file(tmp_path):
+    path = tmp_path / 'lexer.sock'
+    path.write_text('data', encoding='utf-8')
+    with pytest.raises(FileExistsError):
+        serve_socket(LexerService(), str(path))
+    assert path.read_text(encoding='utf-8') == 'data'
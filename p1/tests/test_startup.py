@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+"""命令行入口不导入图形界面和PDF库，启动时间不超过预算"""
+
+import pytest
+
+from benchmark.startup import ENTRIES, run_startup_benchmark
+
+# 只检查明显的退化，预算远大于实际的导入耗时，避免在较慢的机器上偶然失败
+BUDGET_MS = 1000
+
+P1_ENTRIES = [entry for entry in ENTRIES if entry[1] == 'p1']
+
+
+@pytest.fixture(scope='module')
+def startup_results():
+    baseline, results = run_startup_benchmark(repeat=2, budget_ms=BUDGET_MS, entries=P1_ENTRIES)
+    return results
+
+
+@pytest.mark.parametrize('name', [entry[0] for entry in P1_ENTRIES])
+def test_entry_starts_within_budget(startup_results, name):
+    result, = [result for result in startup_results if result['entry'] == name]
+    assert result['failures'] == []
+    # forbidden_imports来自子进程 -X importtime 的输出，即子进程导入的全部模块
+    assert 'PyQt6' not in result['forbidden_imports']
+    assert 'reportlab' not in result['forbidden_imports']
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""单词序列缓存：写入后读出的结果不变，文件修改后未命中，淘汰后总大小不超过上限"""
+
+import os
+import shutil
+
+from token_cache import TokenCache, analyze_file
+
+P1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def copy_example(tmp_path, filename='test_complex.c'):
+    path = tmp_path / filename
+    shutil.copy(os.path.join(P1_DIR, filename), path)
+    return str(path)
+
+
+def cache_key(cache, path):
+    with open(path, 'rb') as f:
+        return cache.key(f.read())
+
+
+def test_store_then_load_round_trips(tmp_path):
+    cache = TokenCache(str(tmp_path / 'cache'))
+    path = copy_example(tmp_path)
+    analyzed = analyze_file(path, cache)
+    loaded = cache.load(cache_key(cache, path))
+    assert loaded is not None
+    assert list(loaded.tokens) == list(analyzed.tokens)
+    assert loaded.identifiers == analyzed.identifiers
+    assert loaded.constants == analyzed.constants
+    assert loaded.error_count == analyzed.error_count
+    # 命中缓存时默认不解码源文件
+    assert list(analyze_file(path, cache).tokens) == list(analyzed.tokens)
+    assert analyze_file(path, cache).content == ''
+    assert analyze_file(path, cache, load_content=True).content == analyzed.content
+
+
+def test_modified_file_misses(tmp_path):
+    cache = TokenCache(str(tmp_path / 'cache'))
+    path = copy_example(tmp_path)
+    analyze_file(path, cache)
+    stat = os.stat(path)
+
+    # 大小不变、修改时间改变的修改
+    with open(path, 'r+b') as f:
+        first = f.read(1)
+        f.seek(0)
+        f.write(b'x' if first != b'x' else b'y')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.load(cache_key(cache, path)) is None
+    analyze_file(path, cache)
+    assert cache.load(cache_key(cache, path)) is not None
+
+    # 大小改变的修改
+    with open(path, 'ab') as f:
+        f.write(b'\nint extra;\n')
+    assert os.path.getsize(path) != stat.st_size
+    assert cache.load(cache_key(cache, path)) is None
+    analyzed = analyze_file(path, cache)
+    assert analyzed.identifiers[-1] == 'extra'
+
+
+def test_evict_stays_within_max_bytes(tmp_path):
+    directory = tmp_path / 'cache'
+    cache = TokenCache(str(directory))
+    path = copy_example(tmp_path)
+    analyze_file(path, cache)
+    entry_size = cache.total_bytes
+    assert entry_size == sum(size for mtime, size, entry_path in cache.entries())
+
+    cache = TokenCache(str(directory), max_bytes=entry_size * 3)
+    for index in range(8):
+        with open(path, 'ab') as f:
+            f.write(f'\n// {index}\n'.encode('ascii'))
+        analyze_file(path, cache)
+        sizes = [size for mtime, size, entry_path in cache.entries()]
+        assert sum(sizes) <= cache.max_bytes
+        assert cache.total_bytes == sum(sizes)
+    # 最近写入的结果总是保留
+    assert cache.load(cache_key(cache, path)) is not None
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert cache.entries() == []
+    assert cache.total_bytes == 0
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+单词序列缓存
+以源文件内容和语言配置的散列值为键，把紧凑的单词序列和符号表以二进制格式保存在磁盘上，
+再次分析同一个文件时直接读入缓存文件，缓存目录按最近使用时间淘汰以限制总大小
+"""
+
+import os
+import sys
+import struct
+import hashlib
+from array import array
+
+from lexical_analyzer import LexicalAnalyzer, SymbolTable, TokenStream, DEFAULT_PROFILE
+
+# 缓存文件格式的版本，格式改变时加1，旧版本的缓存文件视为未命中
+CACHE_FORMAT_VERSION = 2
+CACHE_MAGIC = b'P1TOKENS'
+CACHE_SUFFIX = '.tok'
+
+
+def table_version(profile=None):
+    """单词表的版本：语言配置的散列值，修改任何单词表或改用其他配置后原有缓存自动失效"""
+    return (profile or DEFAULT_PROFILE).digest[:16]
+
+
+# 默认缓存目录和总大小上限，可以用环境变量P1_TOKEN_CACHE指定缓存目录
+DEFAULT_CACHE_DIR = os.environ.get('P1_TOKEN_CACHE') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'p1_lexer')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 文件头：魔数、格式版本、单词表版本、单词数、错误数
+HEADER = struct.Struct('<8sH16sII')
+# 字符串表的头：字符串个数、UTF-8字节数
+STRINGS_HEADER = struct.Struct('<II')
+
+
+def decode_source(data):
+    """源文件的原始字节按UTF-8解码并转换换行符，与LexicalAnalyzer.load_file以文本方式读入的结果相同"""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def read_source(path):
+    """以二进制方式读入源文件，返回 (原始字节, 源代码文本)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return data, decode_source(data)
+
+
+def pack_ints(values):
+    """整数数组按小端序转换为字节串"""
+    values = array('i', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_ints(buffer):
+    values = array('i')
+    values.frombytes(buffer)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def pack_strings(strings):
+    """字符串表：个数和总字节数、各字符串的字节长度、连续存放的UTF-8字节"""
+    encoded = [string.encode('utf-8', 'surrogatepass') for string in strings]
+    blob = b''.join(encoded)
+    return STRINGS_HEADER.pack(len(encoded), len(blob)) + pack_ints(map(len, encoded)) + blob
+
+
+class CacheReader:
+    """按顺序从缓存文件的内容中取出各部分"""
+    def __init__(self, buffer, offset=0):
+        self.buffer = memoryview(buffer)
+        self.offset = offset
+
+    def take(self, size):
+        if self.offset + size > len(self.buffer):
+            raise ValueError("缓存文件不完整")
+        chunk = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def ints(self, count):
+        return unpack_ints(self.take(count * 4))
+
+    def strings(self):
+        count, size = STRINGS_HEADER.unpack(self.take(STRINGS_HEADER.size))
+        lengths = self.ints(count)
+        blob = bytes(self.take(size))
+        strings = []
+        position = 0
+        for length in lengths:
+            strings.append(blob[position:position + length].decode('utf-8', 'surrogatepass'))
+            position += length
+        return strings
+
+
+class TokenCache:
+    """
+    磁盘上的单词序列缓存
+
+    每个缓存文件保存一个源文件的分析结果，文件名为键；命中时更新文件的修改时间。
+    总大小在第一次写入时遍历一次目录得到，之后随写入和删除更新，
+    超过max_bytes时才遍历目录，按修改时间从旧到新删除文件，直到总大小不超过max_bytes；
+    多个进程共用一个目录时各自只计入自己写入的文件，批量分析结束后应再调用一次evict
+    """
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.total_bytes = None
+
+    def key(self, data, profile=None):
+        """由源文件的原始字节、单词表版本和格式版本计算键"""
+        digest = hashlib.sha256()
+        digest.update(f"{CACHE_FORMAT_VERSION}:{table_version(profile)}:".encode('ascii'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def load(self, key, profile=None):
+        """读入缓存的分析结果，返回已完成分析的LexicalAnalyzer，未命中或缓存文件损坏时返回None"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                buffer = f.read()
+        except OSError:
+            return None
+        try:
+            analyzer = self.decode(buffer, profile)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            self.remove(path, len(buffer))
+            return None
+        if analyzer is None:
+            self.remove(path, len(buffer))
+            return None
+        try:
+            # 更新最近使用时间
+            os.utime(path)
+        except OSError:
+            pass
+        return analyzer
+
+    def store(self, key, analyzer):
+        """保存分析结果，analyzer.tokens必须是TokenStream；缓存目录不可写时忽略"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(key)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            data = self.encode(analyzer)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            # 先写临时文件再改名，多个进程同时写入同一个键也不会产生不完整的缓存文件
+            os.replace(temp_path, path)
+        except OSError:
+            return False
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for mtime, size, entry_path in self.entries())
+        else:
+            self.total_bytes += len(data) - replaced
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        return True
+
+    def encode(self, analyzer):
+        tokens = analyzer.tokens
+        value_indexes = tokens.value_table.indexes
+        parts = [
+            HEADER.pack(CACHE_MAGIC, CACHE_FORMAT_VERSION, table_version(analyzer.profile).encode('ascii'),
+                        len(tokens), analyzer.error_count),
+            pack_ints(tokens.types),
+            pack_ints(tokens.values),
+            pack_ints(tokens.lines),
+            pack_ints(tokens.columns),
+            pack_ints(tokens.attributes),
+            pack_strings(tokens.value_table),
+            # 标识符和常数都是单词的值，只保存在值表中的下标
+            pack_ints([len(analyzer.identifiers)]),
+            pack_ints([value_indexes[symbol] for symbol in analyzer.identifiers]),
+            pack_ints([len(analyzer.constants)]),
+            pack_ints([value_indexes[symbol] for symbol in analyzer.constants]),
+            pack_ints([len(tokens.error_msgs)]),
+            pack_ints(list(tokens.error_msgs)),
+            pack_strings(tokens.error_msgs.values()),
+        ]
+        return b''.join(parts)
+
+    def decode(self, buffer, profile=None):
+        reader = CacheReader(buffer)
+        magic, version, tables, count, error_count = HEADER.unpack(reader.take(HEADER.size))
+        if (magic != CACHE_MAGIC or version != CACHE_FORMAT_VERSION or
+                tables.decode('ascii') != table_version(profile)):
+            return None
+
+        tokens = TokenStream()
+        tokens.types = reader.ints(count)
+        tokens.values = reader.ints(count)
+        tokens.lines = reader.ints(count)
+        tokens.columns = reader.ints(count)
+        tokens.attributes = reader.ints(count)
+        values = reader.strings()
+        tokens.value_table = SymbolTable(values)
+        identifiers = SymbolTable(values[i] for i in reader.ints(reader.ints(1)[0]))
+        constants = SymbolTable(values[i] for i in reader.ints(reader.ints(1)[0]))
+        error_indexes = reader.ints(reader.ints(1)[0])
+        tokens.error_msgs = dict(zip(error_indexes, reader.strings()))
+        if reader.offset != len(reader.buffer):
+            raise ValueError("缓存文件长度不正确")
+
+        analyzer = LexicalAnalyzer(compact=True, profile=profile)
+        analyzer.tokens = tokens
+        analyzer.identifiers = identifiers
+        analyzer.constants = constants
+        analyzer.error_count = error_count
+        return analyzer
+
+    def entries(self):
+        """返回缓存目录中的全部 (修改时间, 大小, 路径)"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """遍历缓存目录，删除最久未使用的缓存文件，直到总大小不超过上限"""
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            self.remove(path)
+        self.total_bytes = 0
+
+    def remove(self, path, size=0):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        if self.total_bytes is not None:
+            self.total_bytes -= size
+
+
+# 本进程共用的默认缓存，批量分析时各文件共用同一个总大小计数
+_shared_cache = None
+
+
+def shared_cache():
+    """返回本进程共用的默认目录的缓存"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = TokenCache()
+    return _shared_cache
+
+
+def analyze_file(path, cache=None, backend='default', profile=None, load_content=False):
+    """
+    分析源文件，结果保存在紧凑的TokenStream中
+    cache不为None时先按文件内容和语言配置查找缓存，未命中则分析后写入缓存；无法读取文件时返回None。
+    命中缓存时不解码源文件，load_content为True时才解码并填入analyzer.content
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        print(f"无法打开文件: {e}")
+        return None
+
+    key = None
+    if cache is not None:
+        key = cache.key(data, profile)
+        analyzer = cache.load(key, profile)
+        if analyzer is not None:
+            analyzer.input_file = path
+            if load_content:
+                # 缓存的内容曾经成功解码，不会再出现解码错误
+                analyzer.content = decode_source(data)
+                analyzer.position = len(analyzer.content)
+            return analyzer
+
+    try:
+        text = decode_source(data)
+    except UnicodeDecodeError as e:
+        print(f"无法打开文件: {e}")
+        return None
+    analyzer = LexicalAnalyzer(path, backend=backend, compact=True, profile=profile)
+    analyzer.load_string(text)
+    analyzer.analyze()
+    if cache is not None:
+        cache.store(key, analyzer)
+    return analyzer
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+单词序列导出
+把分析结果以JSON Lines、CSV或列式二进制格式写出，供其他程序直接读取，
+各格式都从紧凑的TokenStream按列生成，值表中的每个字符串只转义一次，输出按块写入
+"""
+
+import csv
+import json
+import struct
+
+from lexical_analyzer import SymbolTable, TokenStream, TYPE_ERROR_CODE
+from token_cache import pack_ints, pack_strings, CacheReader
+
+# 支持的导出格式，text为print_results的定宽文本
+EXPORT_FORMATS = ('text', 'jsonl', 'csv', 'columnar')
+
+# 以二进制方式写出的格式
+BINARY_FORMATS = ('columnar',)
+
+# 每次写出的单词数
+WRITE_BATCH = 16384
+
+# CSV的列
+CSV_HEADER = ['type', 'value', 'attribute', 'line', 'column', 'error_msg']
+
+# 列式格式的文件头：魔数、格式版本、单词数
+COLUMNAR_MAGIC = b'P1COLUMN'
+COLUMNAR_VERSION = 1
+COLUMNAR_HEADER = struct.Struct('<8sHI')
+
+
+def as_stream(tokens):
+    """单词序列转换为TokenStream，已经是TokenStream时直接返回"""
+    if isinstance(tokens, TokenStream):
+        return tokens
+    stream = TokenStream()
+    stream.extend(tokens)
+    return stream
+
+
+def error_message(stream, index):
+    return stream.error_msgs.get(index, stream.value_table[stream.values[index]])
+
+
+def write_jsonl(tokens, out):
+    """
+    每个单词一行JSON对象，字段与Token相同：
+    {"type": 种别码, "value": 值, "attribute": 属性值, "line": 行号, "column": 列号}，
+    错误单词的type为"Error"，没有attribute而有error_msg
+    """
+    stream = as_stream(tokens)
+    values = [json.dumps(value, ensure_ascii=False) for value in stream.value_table]
+    types, value_ids, lines, columns, attributes = (stream.types, stream.values, stream.lines,
+                                                     stream.columns, stream.attributes)
+    for start in range(0, len(stream), WRITE_BATCH):
+        rows = []
+        for index in range(start, min(start + WRITE_BATCH, len(stream))):
+            token_type = types[index]
+            if token_type == TYPE_ERROR_CODE:
+                rows.append(f'{{"type": "Error", "value": {values[value_ids[index]]}, "line": {lines[index]}, '
+                            f'"column": {columns[index]}, '
+                            f'"error_msg": {json.dumps(error_message(stream, index), ensure_ascii=False)}}}\n')
+            else:
+                rows.append(f'{{"type": {token_type}, "value": {values[value_ids[index]]}, '
+                            f'"attribute": {attributes[index]}, "line": {lines[index]}, "column": {columns[index]}}}\n')
+        out.write(''.join(rows))
+
+
+def write_csv(tokens, out):
+    """带表头的CSV，列见CSV_HEADER；错误单词的type为Error，attribute为空"""
+    stream = as_stream(tokens)
+    values = stream.value_table.symbols
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(CSV_HEADER)
+    for start in range(0, len(stream), WRITE_BATCH):
+        rows = []
+        for index in range(start, min(start + WRITE_BATCH, len(stream))):
+            token_type = stream.types[index]
+            if token_type == TYPE_ERROR_CODE:
+                rows.append(('Error', values[stream.values[index]], '', stream.lines[index],
+                             stream.columns[index], error_message(stream, index)))
+            else:
+                rows.append((token_type, values[stream.values[index]], stream.attributes[index],
+                             stream.lines[index], stream.columns[index], ''))
+        writer.writerows(rows)
+
+
+def write_columnar(tokens, out):
+    """
+    列式二进制格式，整数均为小端序的32位有符号整数：
+    文件头（魔数P1COLUMN、2字节版本号、单词数），
+    种别码、值下标、行号、列号、属性值五列（错误单词的种别码为0、属性值为-1），
+    值表（字符串个数、UTF-8总字节数、各字符串的字节长度、连续存放的UTF-8字节），
+    错误单词个数、各错误单词的下标、错误信息表（格式同值表）
+    """
+    stream = as_stream(tokens)
+    errors = stream.error_indexes()
+    out.write(COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(stream)))
+    for column in (stream.types, stream.values, stream.lines, stream.columns, stream.attributes):
+        out.write(pack_ints(column))
+    out.write(pack_strings(stream.value_table))
+    out.write(pack_ints([len(errors)]))
+    out.write(pack_ints(errors))
+    out.write(pack_strings([error_message(stream, index) for index in errors]))
+
+
+def read_columnar(buffer):
+    """读入列式格式的内容，返回TokenStream"""
+    reader = CacheReader(buffer)
+    magic, version, count = COLUMNAR_HEADER.unpack(reader.take(COLUMNAR_HEADER.size))
+    if magic != COLUMNAR_MAGIC or version != COLUMNAR_VERSION:
+        raise ValueError("不是列式单词序列文件")
+    stream = TokenStream()
+    stream.types = reader.ints(count)
+    stream.values = reader.ints(count)
+    stream.lines = reader.ints(count)
+    stream.columns = reader.ints(count)
+    stream.attributes = reader.ints(count)
+    stream.value_table = SymbolTable(reader.strings())
+    errors = reader.ints(reader.ints(1)[0])
+    for index, error_msg in zip(errors, reader.strings()):
+        if error_msg != stream.value_table[stream.values[index]]:
+            stream.error_msgs[index] = error_msg
+    return stream
+
+
+EXPORTERS = {
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+    'columnar': write_columnar,
+}
+
+
+def export_tokens(tokens, output_format, out):
+    """
+    按格式写出单词序列；out为文本流，columnar格式为二进制流
+    text格式由LexicalAnalyzer.print_results输出，不在这里处理
+    """
+    if output_format not in EXPORTERS:
+        raise ValueError(f"未知的导出格式: {output_format}")
+    EXPORTERS[output_format](tokens, out)
+
+
+def open_output(path, output_format):
+    """打开输出文件，文本格式使用UTF-8编码，CSV按csv模块的要求不转换换行符"""
+    if output_format in BINARY_FORMATS:
+        return open(path, 'wb')
+    return open(path, 'w', encoding='utf-8', newline='' if output_format == 'csv' else None)
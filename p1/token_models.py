@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+词法分析结果的表格模型
+词法单元表、错误表、标识符表和常数表都以模型的形式提供给视图，
+视图只为可见的行请求数据，单词在显示时才从紧凑的单词序列中取出，分析结果的规模不影响显示速度
+"""
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+# 错误行的背景色
+ERROR_COLOR = QColor(255, 200, 200)
+
+
+class TokenTableModel(QAbstractTableModel):
+    """词法单元表模型，数据源为TokenStream或Token列表"""
+    headers = ['单词', '类型', '属性值', '行号', '列号']
+
+    def __init__(self, analyzer, parent=None):
+        super().__init__(parent)
+        # 用于取得类型名称和属性值
+        self.analyzer = analyzer
+        self.tokens = []
+
+    def set_tokens(self, tokens, analyzer=None):
+        """更换整个单词序列"""
+        self.beginResetModel()
+        self.tokens = tokens
+        if analyzer is not None:
+            self.analyzer = analyzer
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tokens)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            token = self.tokens[index.row()]
+            column = index.column()
+            if column == 0:
+                return token['value']
+            if column == 1:
+                return '错误' if token['type'] == 'Error' else self.analyzer.get_type_name(token['type'])
+            if column == 2:
+                return 'N/A' if token['type'] == 'Error' else str(self.analyzer.get_token_attribute(token))
+            if column == 3:
+                return str(token['line'])
+            return str(token['column'])
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if self.tokens[index.row()]['type'] == 'Error':
+                return ERROR_COLOR
+        return None
+
+    def token_at(self, row):
+        """第row行的单词"""
+        return self.tokens[row]
+
+    def append_stream(self, batch):
+        """在末尾追加一批单词（后台分析时数据源为TokenStream）"""
+        if not len(batch):
+            return
+        first = len(self.tokens)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self.tokens.extend_stream(batch)
+        self.endInsertRows()
+
+    def apply_patch(self, patch):
+        """
+        按增量分析的结果修改单词列表（实时分析时数据源为Token列表）
+        被重新扫描的行原地替换，多删少补，之后的行只通知行号和属性值的变化
+        """
+        tokens = self.tokens
+        start = patch.start_row
+        added = len(patch.tokens)
+        common = min(patch.removed, added)
+
+        if common:
+            tokens[start:start + common] = patch.tokens[:common]
+            self.dataChanged.emit(self.index(start, 0), self.index(start + common - 1, len(self.headers) - 1))
+        if patch.removed > common:
+            first = start + common
+            self.beginRemoveRows(QModelIndex(), first, start + patch.removed - 1)
+            del tokens[first:start + patch.removed]
+            self.endRemoveRows()
+        elif added > common:
+            first = start + common
+            self.beginInsertRows(QModelIndex(), first, start + added - 1)
+            tokens[first:first] = patch.tokens[common:]
+            self.endInsertRows()
+
+        if patch.line_shift and patch.tail_row < len(tokens):
+            for token in tokens[patch.tail_row:]:
+                token.line += patch.line_shift
+            self.dataChanged.emit(self.index(patch.tail_row, 3), self.index(len(tokens) - 1, 3))
+        for row, attribute in patch.attributes:
+            tokens[row].attribute = attribute
+            self.dataChanged.emit(self.index(row, 2), self.index(row, 2))
+
+
+class ErrorTableModel(QAbstractTableModel):
+    """错误表模型，保存错误单词在单词序列中的下标，显示时再取出"""
+    headers = ['错误', '行号', '列号']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tokens = []
+        self.indexes = []
+
+    def set_errors(self, tokens, indexes=None):
+        """tokens为单词序列，indexes为其中错误单词的下标；indexes为None时tokens中全部是错误单词"""
+        self.beginResetModel()
+        self.tokens = tokens
+        self.indexes = list(range(len(tokens))) if indexes is None else indexes
+        self.endResetModel()
+
+    def token_at(self, row):
+        """第row行的错误单词"""
+        return self.tokens[self.indexes[row]]
+
+    def append_errors(self, indexes):
+        """追加错误单词的下标"""
+        if not indexes:
+            return
+        first = len(self.indexes)
+        self.beginInsertRows(QModelIndex(), first, first + len(indexes) - 1)
+        self.indexes.extend(indexes)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.indexes)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        token = self.tokens[self.indexes[index.row()]]
+        column = index.column()
+        if column == 0:
+            return token['error_msg']
+        if column == 1:
+            return str(token['line'])
+        return str(token['column'])
+
+
+class SymbolListModel(QAbstractListModel):
+    """标识符表、常数表模型，数据源为SymbolTable"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.symbols = []
+
+    def set_symbols(self, symbols):
+        self.beginResetModel()
+        self.symbols = symbols
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.symbols)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role == Qt.ItemDataRole.DisplayRole:
+            return self.symbols[index.row()]
+        return None